@@ -0,0 +1,374 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .main import print_schedules
+from .managers import BreakManager, CheckoutManager, DataManager, ResultCache
+
+CASHIERS_FILE = "cashiers.json"
+CONFIG_FILE = "config.json"
+# How often running stores are checked against the timeout
+TIMEOUT_POLL_SECONDS = 0.5
+
+
+@dataclass
+class StoreJob:
+    name: str
+    cashiers_path: Path
+    config_path: Path
+    output_path: Path
+    cache_directory: Optional[Path] = None
+
+    @property
+    def input_bytes(self) -> int:
+        """Size of the inputs, used to start the biggest stores first."""
+        try:
+            return self.cashiers_path.stat().st_size + self.config_path.stat().st_size
+        except OSError:
+            return 0
+
+
+@dataclass
+class StoreResult:
+    name: str
+    ok: bool
+    # Wall time of the store in its worker, loading and writing the output included
+    seconds: float
+    output_path: Optional[str] = None
+    # "<exception type>: <message>" when the store failed
+    error: Optional[str] = None
+    cashiers: int = 0
+    checkouts: int = 0
+    cache_hit: Optional[bool] = None
+
+
+def discover_stores(directory: Path, output_directory: Path, cache_directory: Optional[Path] = None) -> List[StoreJob]:
+    """A job for every subdirectory of directory holding a cashiers.json and a config.json, by name."""
+    directory = Path(directory)
+    if not directory.is_dir():
+        raise ValueError(f"{directory} is not a directory")
+    jobs = [
+        StoreJob(
+            name=store.name,
+            cashiers_path=store / CASHIERS_FILE,
+            config_path=store / CONFIG_FILE,
+            output_path=Path(output_directory) / f"{store.name}.txt",
+            cache_directory=cache_directory,
+        )
+        for store in sorted(directory.iterdir())
+        if (store / CASHIERS_FILE).is_file() and (store / CONFIG_FILE).is_file()
+    ]
+    if not jobs:
+        raise ValueError(f"No stores with a {CASHIERS_FILE} and a {CONFIG_FILE} found in {directory}")
+    return jobs
+
+
+def load_manifest(path: Path, output_directory: Path, cache_directory: Optional[Path] = None) -> List[StoreJob]:
+    """
+    Jobs from a json manifest, a list of {"name": ..., "cashiers": ..., "config": ...}.
+    Relative paths are relative to the manifest.
+    """
+    path = Path(path)
+    try:
+        with open(path, "r") as json_file:
+            manifest = json.load(json_file)
+    except json.decoder.JSONDecodeError:
+        raise ValueError(f"{path} is not a valid json file")
+    if not isinstance(manifest, list) or not manifest:
+        raise ValueError(f"{path} must be a non-empty list of stores")
+
+    jobs = []
+    for store in manifest:
+        if not isinstance(store, dict) or not all(key in store for key in ("name", "cashiers", "config")):
+            raise ValueError(f"Every store in {path} needs a name, cashiers and config: {store!r}")
+        # The name becomes the output file name, so it must not lead out of the output directory
+        name = str(store["name"])
+        if not name or name == "." or ".." in name or any(separator in name for separator in ("/", "\\")):
+            raise ValueError(f"Store name {name!r} in {path} must not be empty or contain path separators or '..'")
+        jobs.append(StoreJob(
+            name=name,
+            cashiers_path=path.parent / store["cashiers"],
+            config_path=path.parent / store["config"],
+            output_path=Path(output_directory) / f"{name}.txt",
+            cache_directory=cache_directory,
+        ))
+    names = [job.name for job in jobs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Store names must be unique, found {', '.join(duplicates)} more than once")
+    return jobs
+
+
+def _failed_store(job: StoreJob, seconds: float, error: str) -> StoreResult:
+    """Result of a failed store, whose output from an earlier run is removed."""
+    with contextlib.suppress(OSError):
+        job.output_path.unlink()
+    return StoreResult(job.name, False, seconds, error=error)
+
+
+def _timed_out_store(job: StoreJob, seconds: float, timeout: float) -> StoreResult:
+    return _failed_store(job, seconds, f"TimeoutError: no result after {timeout:g}s")
+
+
+def schedule_store(job: StoreJob) -> StoreResult:
+    """
+    Schedules one store and writes its schedules to job.output_path, the same output main.py
+    prints. Any exception is caught and reported in the result, so one store cannot stop the
+    others; a failed store also has its output from an earlier run removed.
+    """
+    start = time.perf_counter()
+    try:
+        data_manager = DataManager()
+        data_manager.load_data(str(job.cashiers_path.resolve()))
+        data_manager.load_config(str(job.config_path.resolve()))
+        break_manager = BreakManager(data_manager.cashiers, data_manager.all_breaks)
+        checkout_manager = CheckoutManager(data_manager.cashiers, data_manager.checkouts, data_manager.compiled_config)
+        cache_hit = None
+        if job.cache_directory is not None:
+            cache_hit = ResultCache(job.cache_directory).run(break_manager, checkout_manager)
+        else:
+            break_manager.generate_breaks_list()
+            checkout_manager.assign_checkouts_to_cashiers()
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            print_schedules(break_manager, data_manager.cashiers, data_manager.checkouts)
+        job.output_path.parent.mkdir(parents=True, exist_ok=True)
+        job.output_path.write_text(output.getvalue())
+    except Exception as e:
+        return _failed_store(job, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+    return StoreResult(
+        job.name, True, time.perf_counter() - start,
+        output_path=str(job.output_path),
+        cashiers=len(data_manager.cashiers),
+        checkouts=len(data_manager.checkouts),
+        cache_hit=cache_hit,
+    )
+
+
+def _schedule_chunk(jobs: List[StoreJob]) -> List[StoreResult]:
+    return [schedule_store(job) for job in jobs]
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    """Stops the worker processes of executor, including one stuck in a store, and shuts it down."""
+    terminate_workers = getattr(executor, "terminate_workers", None)
+    if terminate_workers is not None:
+        terminate_workers()
+    else:
+        # ProcessPoolExecutor has no public way to stop its workers before Python 3.14
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+    executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _run_pool(jobs: Sequence[StoreJob],
+              order: List[int],
+              workers: int,
+              chunksize: int,
+              timeout: Optional[float],
+              results: Dict[int, StoreResult]) -> List[int]:
+    """
+    Schedules the stores at the indexes in order in one pool of worker processes, chunksize
+    stores at a time, and fills in their results. Stops as soon as a worker process dies or a
+    chunk runs for longer than timeout seconds per store, and returns the indexes of the stores
+    left without a result, in order. A store alone in a chunk that timed out fails right away.
+    """
+    chunks = [order[i:i + chunksize] for i in range(0, len(order), chunksize)]
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+    try:
+        futures = {executor.submit(_schedule_chunk, [jobs[index] for index in chunk]): chunk for chunk in chunks}
+        # When every chunk was first seen running
+        started: Dict[Future, float] = {}
+        pending = set(futures)
+        broken = False
+        while pending and not broken:
+            done, pending = wait(pending, timeout=TIMEOUT_POLL_SECONDS if timeout else None, return_when=FIRST_COMPLETED)
+            now = time.perf_counter()
+            for future in done:
+                chunk = futures[future]
+                try:
+                    chunk_results = future.result()
+                except BrokenProcessPool:
+                    broken = True
+                    continue
+                except Exception as e:
+                    chunk_results = [
+                        _failed_store(jobs[index], now - started.get(future, now), f"{type(e).__name__}: {e}")
+                        for index in chunk
+                    ]
+                for index, result in zip(chunk, chunk_results):
+                    results[index] = result
+            for future in pending:
+                if future.running():
+                    started.setdefault(future, now)
+                chunk = futures[future]
+                if timeout is not None and future in started and now - started[future] > timeout * len(chunk):
+                    broken = True
+                    if len(chunk) == 1:
+                        # Alone in its chunk, so it is the store that hung
+                        results[chunk[0]] = _timed_out_store(jobs[chunk[0]], now - started[future], timeout)
+    except BaseException:
+        _terminate(executor)
+        raise
+
+    if broken:
+        _terminate(executor)
+    else:
+        executor.shutdown()
+    return [index for index in order if index not in results]
+
+
+def _run_isolated(jobs: Sequence[StoreJob],
+                  indexes: List[int],
+                  workers: int,
+                  timeout: Optional[float],
+                  results: Dict[int, StoreResult]) -> None:
+    """
+    Schedules every store at indexes in a worker process of its own, at most workers at a time,
+    and fills in their results. A store whose process dies or which runs for longer than timeout
+    seconds fails, without affecting any other store.
+    """
+    waiting = list(indexes)
+    # {future: (index, executor, start time)}
+    running: Dict[Future, Tuple[int, ProcessPoolExecutor, float]] = {}
+    try:
+        while waiting or running:
+            while waiting and len(running) < workers:
+                index = waiting.pop(0)
+                executor = ProcessPoolExecutor(max_workers=1)
+                running[executor.submit(schedule_store, jobs[index])] = (index, executor, time.perf_counter())
+
+            done, _ = wait(running, timeout=TIMEOUT_POLL_SECONDS if timeout else None, return_when=FIRST_COMPLETED)
+            now = time.perf_counter()
+            for future in done:
+                index, executor, start = running.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = _failed_store(jobs[index], now - start, f"{type(e).__name__}: {e}")
+                executor.shutdown()
+            if timeout is not None:
+                for future, (index, executor, start) in list(running.items()):
+                    if now - start > timeout:
+                        del running[future]
+                        _terminate(executor)
+                        results[index] = _timed_out_store(jobs[index], now - start, timeout)
+    finally:
+        for _, executor, _ in running.values():
+            _terminate(executor)
+
+
+def run_batch(jobs: Sequence[StoreJob],
+              workers: Optional[int] = None,
+              chunksize: int = 1,
+              timeout: Optional[float] = None) -> List[StoreResult]:
+    """
+    Schedules every store in worker processes and returns the results in the order of jobs.
+    The biggest stores are handed out first, so a big store started last does not leave
+    the other workers idle at the end.
+
+    A store can only fail itself. Exceptions end up in its result, and if a worker process dies
+    (e.g. killed for running out of memory) or a store takes longer than timeout seconds, the
+    stores the pool had not finished are scheduled again, each in a process of its own, so
+    only the store that crashed or hung fails. With workers=1 and no timeout everything runs
+    in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1 or chunksize < 1:
+        raise ValueError("workers and chunksize must be at least 1")
+    if timeout is not None and timeout <= 0:
+        raise ValueError("timeout must be positive")
+
+    order = sorted(range(len(jobs)), key=lambda index: -jobs[index].input_bytes)
+    results: Dict[int, StoreResult] = {}
+    if workers == 1 and timeout is None:
+        for index in order:
+            results[index] = schedule_store(jobs[index])
+    elif order:
+        unfinished = _run_pool(jobs, order, workers, chunksize, timeout, results)
+        _run_isolated(jobs, unfinished, workers, timeout, results)
+    return [results[index] for index in range(len(jobs))]
+
+
+def batch_report(results: Sequence[StoreResult], wall_seconds: float, workers: int) -> Dict[str, Any]:
+    """Per-store results and totals as json serializable data."""
+    store_seconds = sum(result.seconds for result in results)
+    return {
+        "workers": workers,
+        "wall_seconds": wall_seconds,
+        "store_seconds": store_seconds,
+        # How many stores were scheduled at once on average, ideally close to workers
+        "speedup": store_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+        "succeeded": sum(1 for result in results if result.ok),
+        "failed": sum(1 for result in results if not result.ok),
+        "stores": [asdict(result) for result in results],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Creates the breaks list and checkout schedule of many stores in parallel.")
+    parser.add_argument("stores", type=Path,
+                        help="directory with a subdirectory (cashiers.json and config.json) per store, or a json manifest")
+    parser.add_argument("--output", type=Path, required=True, metavar="DIR",
+                        help="directory for the schedules, one <store>.txt per store")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: number of cpus)")
+    parser.add_argument("--chunksize", type=int, default=1,
+                        help="stores handed to a worker at a time (default: 1)")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                        help="fail a store that has no result after this many seconds (default: no limit)")
+    parser.add_argument("--report", type=Path, metavar="REPORT_JSON",
+                        help="write the per-store results and timings as json to this file")
+    parser.add_argument("--cache", type=Path, metavar="DIR",
+                        help="reuse the result of an earlier run with the same inputs from this directory")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.chunksize < 1:
+        parser.error("--workers and --chunksize must be at least 1")
+    if args.timeout is not None and args.timeout <= 0:
+        parser.error("--timeout must be positive")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        if args.stores.is_dir():
+            jobs = discover_stores(args.stores, args.output, args.cache)
+        else:
+            jobs = load_manifest(args.stores, args.output, args.cache)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    results = run_batch(jobs, workers=args.workers, chunksize=args.chunksize, timeout=args.timeout)
+    report = batch_report(results, time.perf_counter() - start, args.workers)
+
+    name_width = max(len(result.name) for result in results)
+    for result in results:
+        status = "ok" if result.ok else f"FAILED {result.error}"
+        print(f"{result.name:<{name_width}}  {result.seconds:8.3f}s  {status}")
+    print(f"{report['succeeded']} of {len(results)} stores scheduled in {report['wall_seconds']:.3f}s "
+          f"with {args.workers} worker(s), {report['store_seconds']:.3f}s of store time "
+          f"(speedup {report['speedup']:.2f})")
+
+    if args.report:
+        with open(args.report, "w") as json_file:
+            json.dump(report, json_file, indent=4)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
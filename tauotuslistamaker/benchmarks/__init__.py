@@ -0,0 +1,3 @@
+from .store_generator import generate_store, write_store
+from .scaling import run_scaling_benchmark, scaling_exponent
+from .harness import Timing, measure, save_baseline, load_baseline, compare
\ No newline at end of file
@@ -0,0 +1,76 @@
+import json
+import math
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+
+class Timing(NamedTuple):
+    """Percentiles of the per-call time of one benchmark case, in seconds."""
+    samples: int
+    minimum: float
+    p50: float
+    p90: float
+    p99: float
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        raise ValueError("percentile of an empty list")
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def measure(call: Callable[[], object],
+            samples: int = 200,
+            warmup: int = 20,
+            number: int = 1,
+            reset: Optional[Callable[[], object]] = None) -> Timing:
+    """
+    Times call: warmup untimed rounds first, then samples timed rounds of number calls each.
+    reset runs untimed after every round, for calls that change what they measure
+    (e.g. undoing an add), and then number should be 1.
+    """
+    if samples < 1 or number < 1:
+        raise ValueError("samples and number must be at least 1")
+    if reset is not None and number != 1:
+        raise ValueError("number must be 1 when reset is given")
+
+    for _ in range(warmup):
+        for _ in range(number):
+            call()
+        if reset is not None:
+            reset()
+
+    timings = []
+    clock = time.perf_counter
+    for _ in range(samples):
+        start = clock()
+        for _ in range(number):
+            call()
+        timings.append((clock() - start) / number)
+        if reset is not None:
+            reset()
+
+    timings.sort()
+    return Timing(samples, timings[0], percentile(timings, 0.5), percentile(timings, 0.9), percentile(timings, 0.99))
+
+
+def save_baseline(path: Path, timings: Dict[str, Timing]) -> None:
+    with open(path, "w") as json_file:
+        json.dump({name: timing._asdict() for name, timing in timings.items()}, json_file, indent=4)
+
+
+def load_baseline(path: Path) -> Dict[str, Timing]:
+    with open(path, "r") as json_file:
+        return {name: Timing(**timing) for name, timing in json.load(json_file).items()}
+
+
+def compare(timings: Dict[str, Timing], baseline: Dict[str, Timing]) -> Dict[str, float]:
+    """p50 of every case divided by its baseline p50, for the cases the baseline has."""
+    return {
+        name: timing.p50 / baseline[name].p50
+        for name, timing in timings.items()
+        if name in baseline and baseline[name].p50 > 0
+    }
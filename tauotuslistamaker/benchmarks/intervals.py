@@ -0,0 +1,130 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from ..collections import CashierScheduleCollection, TimeIntervalCollection
+from ..models import Cashier, TimeInterval
+from .harness import Timing, compare, load_baseline, measure, save_baseline
+
+# 10 events is a normal shift, 1000 and 10000 are far beyond any real schedule and show
+# how the data structures behave when they grow
+DEFAULT_EVENT_COUNTS = (10, 1000, 10000)
+# Every event is EVENT_MINUTES long and starts EVENT_SPACING minutes after the previous one,
+# so there is a free gap after every event
+EVENT_MINUTES = 15
+EVENT_SPACING = 30
+# Calls per timed round of the cases that are too fast to time one call at a time
+BATCH = 100
+
+# (name, call, reset, number) of one benchmark case
+Case = Tuple[str, Callable[[], object], Callable[[], object] | None, int]
+
+
+def _build_schedule(event_count: int) -> CashierScheduleCollection:
+    """A cashier schedule with event_count evenly spaced events and a free gap after each of them."""
+    cashier = Cashier("Benchmark", None)
+    schedule = CashierScheduleCollection(TimeInterval(0, event_count * EVENT_SPACING), cashier)
+    cashier.schedule = schedule
+    for index in range(event_count):
+        start_time = index * EVENT_SPACING
+        schedule.add_interval(TimeInterval(start_time, start_time + EVENT_MINUTES))
+    return schedule
+
+
+def interval_cases() -> List[Case]:
+    """TimeInterval operations, which do not depend on any event count."""
+    interval = TimeInterval(0, 60)
+    inside = TimeInterval(15, 30)
+    return [
+        ("interval.contains", lambda: interval.contains(inside), None, BATCH),
+        ("interval.overlaps", lambda: interval.overlaps(inside), None, BATCH),
+        ("interval.subtract", lambda: interval.subtract(inside), None, BATCH),
+    ]
+
+
+def collection_cases(event_count: int) -> List[Case]:
+    """TimeIntervalCollection and schedule operations in the middle of event_count events."""
+    schedule = _build_schedule(event_count)
+    collection = TimeIntervalCollection()
+    for interval in schedule.all_events:
+        collection.add_interval(interval)
+
+    middle = schedule.all_events[event_count // 2]
+    # The free gap right after the middle event
+    gap = TimeInterval(middle.end_time, middle.start_time + EVENT_SPACING)
+
+    def move_back() -> None:
+        schedule.try_move_interval(middle, -EVENT_MINUTES, commit=True)
+
+    def forget_availability() -> None:
+        schedule._availability_valid = False
+
+    suffix = f"[n={event_count}]"
+    return [
+        ("collection.add_interval" + suffix, lambda: collection.add_interval(gap),
+         lambda: collection.remove_interval(gap), 1),
+        ("collection.can_add_interval" + suffix, lambda: collection.can_add_interval(gap), None, BATCH),
+        ("collection.remove_interval" + suffix, lambda: collection.remove_interval(middle),
+         lambda: collection.add_interval(middle), 1),
+        ("schedule.availability.rebuild" + suffix, lambda: schedule.availability, forget_availability, 1),
+        ("schedule.availability.cached" + suffix, lambda: schedule.availability, None, BATCH),
+        ("schedule.try_move_interval.check" + suffix,
+         lambda: schedule.try_move_interval(middle, EVENT_MINUTES, commit=False), None, BATCH),
+        ("schedule.try_move_interval.commit" + suffix,
+         lambda: schedule.try_move_interval(middle, EVENT_MINUTES, commit=True), move_back, 1),
+    ]
+
+
+def run_interval_benchmarks(event_counts: Sequence[int] = DEFAULT_EVENT_COUNTS,
+                            samples: int = 200,
+                            warmup: int = 20) -> Dict[str, Timing]:
+    """Timings of every case, keyed by case name."""
+    cases = interval_cases()
+    for event_count in event_counts:
+        if event_count < 1:
+            raise ValueError("event counts must be at least 1")
+        cases.extend(collection_cases(event_count))
+    return {
+        name: measure(call, samples, warmup, number, reset)
+        for name, call, reset, number in cases
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the interval data structures.")
+    parser.add_argument("--counts", type=int, nargs="+", default=list(DEFAULT_EVENT_COUNTS),
+                        help="numbers of events in the benchmarked schedules")
+    parser.add_argument("--samples", type=int, default=200, help="timed rounds per case")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed rounds before the timed ones")
+    parser.add_argument("--baseline", type=Path, help="compare the p50 of every case to this baseline file")
+    parser.add_argument("--save-baseline", type=Path, help="write the timings to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="how much slower than the baseline a case may be, 0.2 is 20%%")
+    args = parser.parse_args(argv)
+
+    timings = run_interval_benchmarks(args.counts, args.samples, args.warmup)
+    ratios = compare(timings, load_baseline(args.baseline)) if args.baseline else {}
+
+    regressions = 0
+    print(f"{'case':<44} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10} {'min us':>10}")
+    for name, timing in timings.items():
+        line = f"{name:<44} " + " ".join(
+            f"{value * 1e6:>10.3f}" for value in (timing.p50, timing.p90, timing.p99, timing.minimum)
+        )
+        if name in ratios:
+            line += f"  x{ratios[name]:.2f}"
+            if ratios[name] > 1 + args.tolerance:
+                line += " REGRESSION"
+                regressions += 1
+        print(line)
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, timings)
+    if regressions:
+        print(f"{regressions} case(s) slower than the baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import math
+import platform
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+from ..managers import BreakManager, CheckoutManager, DataManager
+from .store_generator import write_store
+
+PHASES = ("load_data", "load_config", "generate_breaks_list", "assign_checkouts_to_cashiers")
+DEFAULT_SIZES = (10, 25, 50, 100, 200, 400)
+
+
+def _run_phases(cashiers_path: Path, config_path: Path, measure: Callable[[str, Callable[[], Any]], None]) -> DataManager:
+    """Runs the whole scheduling pipeline once, handing every phase to measure(phase, call)."""
+    data_manager = DataManager()
+    measure("load_data", lambda: data_manager.load_data(str(cashiers_path)))
+    measure("load_config", lambda: data_manager.load_config(str(config_path)))
+    break_manager = BreakManager(data_manager.cashiers, data_manager.all_breaks)
+    measure("generate_breaks_list", break_manager.generate_breaks_list)
+    checkout_manager = CheckoutManager(data_manager.cashiers, data_manager.checkouts, data_manager.compiled_config)
+    measure("assign_checkouts_to_cashiers", checkout_manager.assign_checkouts_to_cashiers)
+    return data_manager
+
+
+def benchmark_store(cashiers_path: Path, config_path: Path, repeat: int = 3, memory: bool = True) -> Dict[str, Any]:
+    """
+    Best wall time of every phase over repeat runs, and with memory the peak traced
+    memory of every phase in a separate run, since tracing slows everything down.
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    seconds: Dict[str, float] = {}
+
+    def time_phase(phase: str, call: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - start
+        seconds[phase] = min(seconds.get(phase, elapsed), elapsed)
+
+    for _ in range(repeat):
+        data_manager = _run_phases(cashiers_path, config_path, time_phase)
+
+    result = {
+        "cashiers": len(data_manager.cashiers),
+        "checkouts": len(data_manager.checkouts),
+        "breaks": sum(len(cashier.schedule.own_breaks) for cashier in data_manager.cashiers),
+        "seconds": seconds,
+    }
+
+    if memory:
+        peak_bytes: Dict[str, int] = {}
+
+        def trace_phase(phase: str, call: Callable[[], Any]) -> None:
+            tracemalloc.reset_peak()
+            call()
+            peak_bytes[phase] = tracemalloc.get_traced_memory()[1]
+
+        tracemalloc.start()
+        try:
+            _run_phases(cashiers_path, config_path, trace_phase)
+        finally:
+            tracemalloc.stop()
+        result["peak_bytes"] = peak_bytes
+    return result
+
+
+def scaling_exponent(sizes: Sequence[int], values: Sequence[float]) -> float | None:
+    """
+    Least squares slope of log(value) against log(size): the k of value ~ size**k.
+    None if there are fewer than two usable points.
+    """
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values) if size > 0 and value > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def run_scaling_benchmark(sizes: Sequence[int] = DEFAULT_SIZES,
+                          seed: int = 0,
+                          repeat: int = 3,
+                          memory: bool = True,
+                          directory: Path | None = None) -> Dict[str, Any]:
+    """Benchmarks a synthetic store of every size and fits the scaling exponent of every phase."""
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        store_directory = Path(directory or temporary_directory)
+        results: List[Dict[str, Any]] = []
+        for size in sizes:
+            cashiers_path, config_path = write_store(store_directory, size, seed)
+            results.append(benchmark_store(cashiers_path, config_path, repeat, memory))
+
+    return {
+        "seed": seed,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+        "scaling_exponents": {
+            phase: scaling_exponent(sizes, [result["seconds"][phase] for result in results])
+            for phase in PHASES
+        },
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Times every scheduling phase on synthetic stores of growing size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="cashier counts to benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the store generator")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size, the best time is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak memory run")
+    parser.add_argument("--keep-stores", type=Path, help="directory to write the generated stores to")
+    parser.add_argument("--output", type=Path, help="write the results as json to this file")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    report = run_scaling_benchmark(args.sizes, args.seed, args.repeat, not args.no_memory, args.keep_stores)
+
+    print(f"{'cashiers':>8} " + " ".join(f"{phase:>29}" for phase in PHASES))
+    for result in report["results"]:
+        print(f"{result['cashiers']:>8} " + " ".join(f"{result['seconds'][phase]:>28.4f}s" for phase in PHASES))
+    print(f"{'exponent':>8} " + " ".join(
+        f"{exponent:>29.2f}" if exponent is not None else f"{'-':>29}"
+        for exponent in report["scaling_exponents"].values()
+    ))
+    if not args.no_memory:
+        print(f"{'peak KiB':>8} " + " ".join(
+            f"{report['results'][-1]['peak_bytes'][phase] / 1024:>29.0f}" for phase in PHASES
+        ))
+
+    if args.output:
+        with open(args.output, "w") as json_file:
+            json.dump(report, json_file, indent=4)
@@ -0,0 +1,153 @@
+import json
+import random
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from ..managers import BreakManager, CheckoutManager, DataManager
+from ..utils import MINUTES_PER_DAY, MINUTES_PER_HOUR, SLOT_MINUTES
+
+# The store is open from OPENING_HOUR to CLOSING_HOUR. Shifts stay within those hours: a break
+# relieved at a checkout has to fit in the checkout's opening hours, which a shift running past
+# closing time cannot guarantee.
+OPENING_HOUR = 6
+CLOSING_HOUR = 22
+# (earliest start, latest start) of the shift mixes a store is staffed with, in minutes from midnight.
+# Closing shifts instead end exactly at closing time.
+SHIFT_MIXES = {
+    "opening": (OPENING_HOUR * MINUTES_PER_HOUR, 8 * MINUTES_PER_HOUR),
+    "day": (8 * MINUTES_PER_HOUR, 12 * MINUTES_PER_HOUR),
+    "evening": (12 * MINUTES_PER_HOUR, 15 * MINUTES_PER_HOUR),
+    "closing": (None, None),
+}
+# Cashier i works the shift mix SHIFT_MIX_CYCLE[i % len(SHIFT_MIX_CYCLE)], so every store, however
+# small, has cashiers for the opening and the closing
+SHIFT_MIX_CYCLE = ("opening", "closing", "day", "evening", "day", "opening", "closing", "day", "evening", "day")
+SHIFT_LENGTHS = (180, 240, 300, 360, 375, 420, 450, 480, 510)
+CASHIERS_PER_CHECKOUT = 4
+CHECKOUTS_PER_GROUP = 15
+CASHIERS_PER_SELF_SERVICE = 100
+# Every TOBACCO_EVERY:th checkout of the filling order sells tobacco
+TOBACCO_EVERY = 5
+# Opening hours the checkout groups rotate through; all of them close at CLOSING_HOUR
+GROUP_OPENING_HOURS = (OPENING_HOUR, 8, 9, 10)
+# Random rosters can leave too few cashiers for the mandatory self service lanes and the breaks being
+# covered at some moment, which the scheduler rejects. generate_store draws the shifts again (at most
+# this many times in all) until the store schedules without errors.
+MAX_ATTEMPTS = 20
+
+
+def _clock(minutes: int) -> str:
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // MINUTES_PER_HOUR:02d}:{minutes % MINUTES_PER_HOUR:02d}"
+
+
+def generate_cashiers(cashier_count: int, rng: random.Random) -> List[Dict[str, str]]:
+    """Cashiers in the cashiers.json format, with shifts drawn from SHIFT_MIXES and SHIFT_LENGTHS."""
+    closing_time = CLOSING_HOUR * MINUTES_PER_HOUR
+    cashiers = []
+    for index in range(cashier_count):
+        earliest, latest = SHIFT_MIXES[SHIFT_MIX_CYCLE[index % len(SHIFT_MIX_CYCLE)]]
+        if earliest is None:
+            length = rng.choice(SHIFT_LENGTHS)
+            start = closing_time - length
+        else:
+            start = rng.randrange(earliest, latest + SLOT_MINUTES, SLOT_MINUTES)
+            length = rng.choice([length for length in SHIFT_LENGTHS if start + length <= closing_time])
+        cashiers.append({
+            "name": f"Cashier {index + 1}",
+            "shift_start": _clock(start),
+            "shift_end": _clock(start + length),
+        })
+    return cashiers
+
+
+def generate_config(cashier_count: int) -> Dict[str, Any]:
+    """A config.json sized for cashier_count cashiers: checkout groups, tobacco checkouts and ratios scale with it."""
+    checkout_count = max(4, cashier_count // CASHIERS_PER_CHECKOUT)
+    identifiers = list(range(checkout_count, 0, -1))
+
+    groups = []
+    for group_index, first in enumerate(range(0, checkout_count, CHECKOUTS_PER_GROUP)):
+        opening_hour = GROUP_OPENING_HOURS[group_index % len(GROUP_OPENING_HOURS)]
+        groups.append({
+            "opening_time": f"{opening_hour:02d}:00",
+            "closing_time": f"{CLOSING_HOUR:02d}:00",
+            "checkouts": identifiers[first:first + CHECKOUTS_PER_GROUP],
+            "mandatory_open": False,
+        })
+    self_service_count = max(1, cashier_count // CASHIERS_PER_SELF_SERVICE)
+    groups.append({
+        "opening_time": "09:00",
+        "closing_time": f"{CLOSING_HOUR:02d}:00",
+        "checkouts": [f"Self Service {number}" for number in range(1, self_service_count + 1)],
+        "mandatory_open": True,
+    })
+
+    # The first checkout of the filling order sells tobacco, like in a real store, so the first cashiers
+    # in the morning already satisfy the tobacco ratio
+    tobacco_checkouts = identifiers[::TOBACCO_EVERY]
+    # One more tobacco checkout for every three open checkouts, starting from three. The ratios never
+    # ask for more tobacco checkouts than the first group has, since it is the only group open from
+    # the first to the last minute.
+    first_group_tobacco = len(identifiers[:CHECKOUTS_PER_GROUP:TOBACCO_EVERY])
+    ratios = [
+        {"max_total_checkouts": 3 * tobacco + 2, "tobacco_checkouts": tobacco}
+        for tobacco in range(0, first_group_tobacco + 1)
+    ]
+    return {
+        "checkout_time_groups": groups,
+        "checkouts_filling_order": identifiers,
+        "tobacco_checkouts": tobacco_checkouts,
+        "tobacco_ratio_pool": identifiers,
+        "tobacco_checkout_ratios": ratios,
+    }
+
+
+def schedules_without_errors(cashiers: List[Dict[str, str]], config: Dict[str, Any]) -> bool:
+    """Whether the store can be scheduled, found out by scheduling it once."""
+    with tempfile.TemporaryDirectory() as directory:
+        cashiers_path, config_path = _dump_store(Path(directory), "store", cashiers, config)
+        data_manager = DataManager()
+        data_manager.load_data(str(cashiers_path))
+        data_manager.load_config(str(config_path))
+    try:
+        BreakManager(data_manager.cashiers, data_manager.all_breaks).generate_breaks_list()
+        CheckoutManager(data_manager.cashiers, data_manager.checkouts, data_manager.compiled_config).assign_checkouts_to_cashiers()
+    except ValueError:
+        return False
+    return True
+
+
+def generate_store(cashier_count: int, seed: int = 0, validate: bool = True) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """
+    (cashiers, config) of a synthetic store. The same cashier_count and seed always give the same store.
+    With validate the shifts are drawn again until the store schedules without errors, see MAX_ATTEMPTS.
+    """
+    if cashier_count < 1:
+        raise ValueError("cashier_count must be at least 1")
+    config = generate_config(cashier_count)
+    for attempt in range(MAX_ATTEMPTS):
+        rng = random.Random(f"{seed}:{cashier_count}" if attempt == 0 else f"{seed}:{cashier_count}:{attempt}")
+        cashiers = generate_cashiers(cashier_count, rng)
+        if not validate or schedules_without_errors(cashiers, config):
+            return cashiers, config
+    raise ValueError(f"No store of {cashier_count} cashiers that schedules without errors found for seed {seed}")
+
+
+def _dump_store(directory: Path, suffix: str, cashiers: List[Dict[str, str]], config: Dict[str, Any]) -> Tuple[Path, Path]:
+    cashiers_path = directory / f"cashiers_{suffix}.json"
+    config_path = directory / f"config_{suffix}.json"
+    with open(cashiers_path, "w") as json_file:
+        json.dump(cashiers, json_file, indent=4)
+    with open(config_path, "w") as json_file:
+        json.dump(config, json_file, indent=4)
+    return cashiers_path, config_path
+
+
+def write_store(directory: Path, cashier_count: int, seed: int = 0) -> Tuple[Path, Path]:
+    """Writes a synthetic store as cashiers_<n>.json and config_<n>.json and returns their paths."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    cashiers, config = generate_store(cashier_count, seed)
+    return _dump_store(directory, str(cashier_count), cashiers, config)
@@ -1,3 +1,7 @@
 from .time_interval_collection import TimeIntervalCollection
+from .schedule_snapshot import ScheduleSnapshot
 from .cashier_schedule_collection import CashierScheduleCollection
-from .checkout_schedule_collection import CheckoutScheduleCollection
\ No newline at end of file
+from .checkout_schedule_collection import CheckoutScheduleCollection
+from .active_roster import ActiveRoster
+from .break_pool import BreakPool
+from .occupancy_matrix import OccupancyMatrix
\ No newline at end of file
@@ -0,0 +1,53 @@
+import heapq
+from typing import TYPE_CHECKING
+
+from ..utils import ticks_near
+
+if TYPE_CHECKING:
+    from ..models import Cashier, TimeInterval
+
+
+class ActiveRoster:
+    """
+    The cashiers that are on shift and not on their own break, kept current tick by tick.
+    A cashier's state can only change at ticks near one of their shift or own break
+    boundaries, so those ticks are queued in a heap and only those cashiers are re-checked.
+    """
+
+    def __init__(self, cashiers: list["Cashier"], first_tick_start: int, tick_minutes: int) -> None:
+        self.cashiers = cashiers
+        self._active: set[int] = set()
+        self._available: list["Cashier"] = []
+        # (tick start_time, cashier index) of every tick where a cashier has to be re-checked
+        self._events: list[tuple[int, int]] = []
+        for index, cashier in enumerate(cashiers):
+            boundaries = {cashier.schedule.boundary_interval.start_time, cashier.schedule.boundary_interval.end_time}
+            for break_assignment in cashier.schedule.own_breaks:
+                boundaries.add(break_assignment.start_time)
+                boundaries.add(break_assignment.end_time)
+            # Everyone is checked on the first tick
+            ticks = {first_tick_start}
+            for boundary in boundaries:
+                ticks.update(ticks_near(boundary, first_tick_start, tick_minutes))
+            self._events.extend((tick, index) for tick in ticks)
+        heapq.heapify(self._events)
+
+    def available_during(self, interval: "TimeInterval") -> list["Cashier"]:
+        """
+        Cashiers that are tauottajas or available to work in a checkout during the interval,
+        in roster order. The intervals must be passed in chronological order.
+        """
+        changed = False
+        while self._events and self._events[0][0] <= interval.start_time:
+            _, index = heapq.heappop(self._events)
+            is_active = self.cashiers[index].is_assigned_to_checkout_or_available_during(interval)
+            if is_active != (index in self._active):
+                changed = True
+                if is_active:
+                    self._active.add(index)
+                else:
+                    self._active.discard(index)
+
+        if changed:
+            self._available = [self.cashiers[index] for index in sorted(self._active)]
+        return self._available
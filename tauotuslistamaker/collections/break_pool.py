@@ -0,0 +1,98 @@
+import bisect
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Tuple
+
+if TYPE_CHECKING:
+    from ..models import BreakAssignment, Cashier
+
+
+class BreakPool:
+    """
+    The breaks still waiting for a tauottaja. Keeps them in two orders:
+    insertion order (like a list they were appended to), and start time order
+    with insertion order breaking ties, which is what a stable sort by start
+    time of that list would give. Breaks are also indexed by owner.
+    A break's start time must not change while it is in the pool.
+    """
+
+    def __init__(self, breaks: Iterable["BreakAssignment"] = ()) -> None:
+        self._next_seq = 0
+        # seq -> break, in insertion order
+        self._breaks: Dict[int, "BreakAssignment"] = {}
+        # id(break) -> seq
+        self._seqs: Dict[int, int] = {}
+        # Sorted (start_time, seq) keys
+        self._keys: List[Tuple[int, int]] = []
+        # owner -> {seq: break}, in insertion order
+        self._by_owner: Dict["Cashier", Dict[int, "BreakAssignment"]] = {}
+        # Upper bound of the break lengths, for the overlap range query
+        self._max_length = 0
+        for break_assignment in breaks:
+            self.add(break_assignment)
+
+    def __len__(self) -> int:
+        return len(self._breaks)
+
+    def __bool__(self) -> bool:
+        return bool(self._breaks)
+
+    def __iter__(self) -> Iterator["BreakAssignment"]:
+        """Iterates in insertion order."""
+        return iter(list(self._breaks.values()))
+
+    def __contains__(self, break_assignment: "BreakAssignment") -> bool:
+        return id(break_assignment) in self._seqs
+
+    def add(self, break_assignment: "BreakAssignment") -> None:
+        """Adds the break after every break already in the pool."""
+        if id(break_assignment) in self._seqs:
+            raise ValueError("Break is already in the pool")
+        seq = self._next_seq
+        self._next_seq += 1
+        self._breaks[seq] = break_assignment
+        self._seqs[id(break_assignment)] = seq
+        bisect.insort(self._keys, (break_assignment.start_time, seq))
+        self._by_owner.setdefault(break_assignment.cashier, {})[seq] = break_assignment
+        self._max_length = max(self._max_length, break_assignment.end_time - break_assignment.start_time)
+
+    def remove(self, break_assignment: "BreakAssignment") -> None:
+        """Removes the break; the sorted index is searched with bisect."""
+        seq = self._seqs.pop(id(break_assignment), None)
+        if seq is None:
+            raise ValueError("Break is not in the pool")
+        del self._breaks[seq]
+        index = bisect.bisect_left(self._keys, (break_assignment.start_time, seq))
+        del self._keys[index]
+        owned = self._by_owner[break_assignment.cashier]
+        del owned[seq]
+        if not owned:
+            del self._by_owner[break_assignment.cashier]
+
+    def remove_owner(self, owner: "Cashier") -> List["BreakAssignment"]:
+        """Removes and returns every break of the owner, in insertion order."""
+        owned = list(self._by_owner.get(owner, {}).values())
+        for break_assignment in owned:
+            self.remove(break_assignment)
+        return owned
+
+    def owned_by(self, owner: "Cashier") -> List["BreakAssignment"]:
+        return list(self._by_owner.get(owner, {}).values())
+
+    def in_start_order(self) -> List["BreakAssignment"]:
+        return [self._breaks[seq] for _, seq in self._keys]
+
+    def overlapping_range(self, start_time: int, end_time: int) -> Tuple[int, int]:
+        """
+        Positions [low, high) in in_start_order() that hold every break overlapping
+        [start_time, end_time). Breaks in the range may still end before start_time.
+        """
+        low = bisect.bisect_right(self._keys, (start_time - self._max_length, self._next_seq))
+        high = bisect.bisect_left(self._keys, (end_time, -1))
+        return low, max(low, high)
+
+    def overlapping(self, start_time: int, end_time: int) -> List["BreakAssignment"]:
+        """Breaks overlapping [start_time, end_time), in start order."""
+        low, high = self.overlapping_range(start_time, end_time)
+        return [
+            self._breaks[seq] for _, seq in self._keys[low:high]
+            if self._breaks[seq].end_time > start_time
+        ]
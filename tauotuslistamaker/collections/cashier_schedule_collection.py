@@ -1,84 +1,164 @@
+from functools import lru_cache
+from typing import Tuple
+
 from ..models import TimeInterval
 from .schedule_collection_base import ScheduleCollectionBase
-from ..utils import round_time_to_nearest_quarter
-from datetime import datetime, timedelta
-from ..models import BreakAssignment, Cashier, AvailableInterval
+from .time_interval_collection import TimeIntervalCollection
+from ..utils import ReadOnlyView, round_time_to_nearest_quarter
+from ..models import BreakAssignment, CheckoutAssignment, Cashier, AvailableInterval
+
+
+@lru_cache(maxsize=None)
+def _break_template(shift_start_time: int, shift_end_time: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    (start_time, end_time) of the breaks a shift gets. Cashiers sharing a shift share
+    the template, so it is only worked out once per distinct shift.
+    """
+    shift_length_minutes = shift_end_time - shift_start_time
+    break_minutes = []
+
+    # Determine break requirements
+    if shift_length_minutes < 240:
+        # No breaks
+        pass
+    elif 240 <= shift_length_minutes < 360:
+        break_minutes.append(15)
+    elif 360 <= shift_length_minutes <= 420:
+        break_minutes.extend([15, 15])
+    else:  # > 420 minutes
+        break_minutes.extend([15, 30, 15])
+
+
+    # Determine break placement with even distribution logic
+    template = []
+    if break_minutes:
+        time_between_breaks = shift_length_minutes / (len(break_minutes) + 1)
+        break_start_time = round_time_to_nearest_quarter(shift_start_time + time_between_breaks)
+
+        for length in break_minutes:
+            break_end_time = break_start_time + length
+            template.append((break_start_time, break_end_time))
+
+            # Move to the start of the next break's placement zone
+            break_start_time = round_time_to_nearest_quarter(
+                break_start_time + length + time_between_breaks
+            )
+
+    return tuple(template)
 
 class CashierScheduleCollection(ScheduleCollectionBase):
 
     def __init__(self, boundary_interval: TimeInterval, cashier: Cashier):
         super().__init__(boundary_interval)
         self.cashier = cashier
+        # Time ordered sub-indexes of the events, kept current by the add/remove hooks
+        self._breaks = TimeIntervalCollection()
+        self._own_breaks = TimeIntervalCollection()
+        self._covered_breaks = TimeIntervalCollection()
+        self._checkout_assignments = TimeIntervalCollection()
+
+    def _indexes_for(self, interval: "TimeInterval") -> tuple[TimeIntervalCollection, ...]:
+        if isinstance(interval, BreakAssignment):
+            if interval.cashier is self.cashier:
+                return self._breaks, self._own_breaks
+            return self._breaks, self._covered_breaks
+        if isinstance(interval, CheckoutAssignment):
+            return (self._checkout_assignments,)
+        return ()
+
+    def _interval_added(self, interval: "TimeInterval") -> None:
+        for index in self._indexes_for(interval):
+            index.add_interval(interval)
+
+    def _interval_removed(self, interval: "TimeInterval") -> None:
+        for index in self._indexes_for(interval):
+            index.remove_interval(interval)
 
     @property
-    def all_breaks(self):
-        return [interval for interval in self.all_events if isinstance(interval, BreakAssignment)]
+    def all_breaks(self) -> ReadOnlyView[BreakAssignment]:
+        """Every break in the schedule, own and covered, in time order."""
+        return ReadOnlyView(self._breaks.intervals)
+
+    @property
+    def own_breaks(self) -> ReadOnlyView[BreakAssignment]:
+        """The cashier's own breaks, without the breaks they cover as a tauottaja."""
+        return ReadOnlyView(self._own_breaks.intervals)
+
+    @property
+    def covered_breaks(self) -> ReadOnlyView[BreakAssignment]:
+        """Breaks of other cashiers that this cashier covers as a tauottaja."""
+        return ReadOnlyView(self._covered_breaks.intervals)
+
+    @property
+    def checkout_assignments(self) -> ReadOnlyView[CheckoutAssignment]:
+        return ReadOnlyView(self._checkout_assignments.intervals)
+
+    def own_break_at(self, minute: int) -> BreakAssignment | None:
+        """The cashier's own break covering the given minute, if any."""
+        return self._own_breaks.interval_at(minute)
+
+    def covered_break_at(self, minute: int) -> BreakAssignment | None:
+        """The break this cashier is covering as a tauottaja at the given minute, if any."""
+        return self._covered_breaks.interval_at(minute)
     
-    def _wrap_availability(self, interval):
-        return AvailableInterval.for_cashier(start_time=interval.start_time, end_time=interval.end_time, cashier=self.cashier)
+    def _wrap_availability(self, start_time, end_time):
+        return AvailableInterval.for_cashier(start_time=start_time, end_time=end_time, cashier=self.cashier)
 
     def setup_initial_breaks(self):
         """Calculates and commits the required breaks to the schedule."""
-        shift_length_minutes = self.boundary_interval.length_in_minutes()
-        break_minutes = []
-
-        # Determine break requirements
-        if shift_length_minutes < 240:
-            # No breaks
-            pass
-        elif 240 <= shift_length_minutes < 360:
-            break_minutes.append(15)
-        elif 360 <= shift_length_minutes <= 420:
-            break_minutes.extend([15, 15])
-        else:  # > 420 minutes
-            break_minutes.extend([15, 30, 15])
-
-
-        # Determine break placement with even distribution logic
-        cashier_breaks = []
-        if break_minutes:
-            time_between_breaks = shift_length_minutes / (len(break_minutes) + 1)
-            break_start_time = round_time_to_nearest_quarter(
-                self.boundary_interval.start_time + timedelta(minutes=time_between_breaks)
-            )
-            
-            for length in break_minutes:
-                break_end_time = break_start_time + timedelta(minutes=length)
-                break_interval = BreakAssignment(break_start_time, break_end_time, self.cashier, tauottaja=None)
-                cashier_breaks.append(break_interval)
+        template = _break_template(self.boundary_interval.start_time, self.boundary_interval.end_time)
+        # Commit the breaks to the internal collection
+        for break_start_time, break_end_time in template:
+            self.add_interval(BreakAssignment(break_start_time, break_end_time, self.cashier, tauottaja=None))
 
-                # Move to the start of the next break's placement zone
-                break_start_time = round_time_to_nearest_quarter(
-                    break_start_time + timedelta(minutes=length + time_between_breaks)
-                )
+    def add_remaining_breaks(self, from_minute: int) -> list[BreakAssignment]:
+        """
+        Adds the breaks the cashier is still owed after their shift changed: the breaks of the
+        new shift's template that no break already in the schedule stands for. Every own break
+        stands for the longest unmatched template break no longer than itself, so a shift
+        extended after two 15 minute breaks still gets its 30 minute one. None of them starts before
+        from_minute or before whatever is in progress then, and a break the template placed
+        earlier starts as soon as possible instead. Expects nothing in the schedule to start
+        at or after from_minute. Returns the added breaks.
+        """
+        owed = list(_break_template(self.boundary_interval.start_time, self.boundary_interval.end_time))
+        for length in sorted((b.length_in_minutes() for b in self._own_breaks.intervals), reverse=True):
+            fitting = [entry for entry in owed if entry[1] - entry[0] <= length]
+            if fitting:
+                owed.remove(max(fitting, key=lambda entry: entry[1] - entry[0]))
+
+        cursor = max([from_minute] + [interval.end_time for interval in self.all_events])
+        added = []
+        for break_start_time, break_end_time in owed:
+            if break_start_time < cursor:
+                break_start_time, break_end_time = cursor, cursor + (break_end_time - break_start_time)
+            if break_end_time > self.boundary_interval.end_time:
+                break
+            break_assignment = BreakAssignment(break_start_time, break_end_time, self.cashier, tauottaja=None)
+            self.add_interval(break_assignment)
+            added.append(break_assignment)
+            cursor = break_end_time
+        return added
 
-        # Commit the breaks to the internal collection
-        for break_interval in cashier_breaks:
-            self.add_interval(break_interval)
-        self._availability = None
-    
     def is_on_break_during(self, interval: "TimeInterval") -> tuple[BreakAssignment, bool]:
         """Check if the cashier is on a break during the entire specified interval."""
-        for break_interval in self.all_breaks:
-            if break_interval.contains(interval) and break_interval.cashier is self.cashier:
-                return break_interval, True
+        # Own breaks never overlap, so only the one covering the start can contain the interval
+        break_interval = self._own_breaks.interval_at(interval.start_time)
+        if break_interval is not None and break_interval.contains(interval):
+            return break_interval, True
         return None, False
 
-    def is_on_shift_at(self, date_time: "datetime") -> bool:
-        """Check if the cashier is on shift at the specified date and time."""
-        if not isinstance(date_time, datetime):
-            raise ValueError("date_time must be a datetime object")
-        if self.boundary_interval.start_time <= date_time < self.boundary_interval.end_time:
+    def is_on_shift_at(self, minute: int) -> bool:
+        """Check if the cashier is on shift at the specified minute from the day origin."""
+        if not isinstance(minute, int):
+            raise ValueError("minute must be an int")
+        if self.boundary_interval.start_time <= minute < self.boundary_interval.end_time:
             return True
         return False
     
     def is_tauottaja_during(self, interval: "TimeInterval") -> bool:
         """Check if the cashier is a tauottaja during the entire specified interval."""
-        for event in self.all_events:
-            if event.contains(interval) and isinstance(event, BreakAssignment) and event.cashier is self.cashier:
-                # If the event is not a BreakAssignment, it's a tauottaja assignment
-                return True
-        return False
+        return self.is_on_break_during(interval)[1]
 
     def is_assigned_to_checkout_or_available_during(self, interval: "TimeInterval") -> bool:
         """Check if the cashier is available for checkout duties during the entire specified interval."""
@@ -8,5 +8,5 @@ class CheckoutScheduleCollection(ScheduleCollectionBase):
         super().__init__(boundary_interval)
         self.checkout = checkout
 
-    def _wrap_availability(self, interval):
-        return AvailableInterval.for_checkout(start_time=interval.start_time, end_time=interval.end_time, checkout=self.checkout)
\ No newline at end of file
+    def _wrap_availability(self, start_time, end_time):
+        return AvailableInterval.for_checkout(start_time=start_time, end_time=end_time, checkout=self.checkout)
\ No newline at end of file
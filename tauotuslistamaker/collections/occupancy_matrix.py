@@ -0,0 +1,133 @@
+from typing import TYPE_CHECKING, List, Tuple
+
+from ..models import BreakAssignment, CheckoutAssignment
+from ..utils import SLOT_MINUTES, import_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from ..managers import DataManager
+    from ..models import Cashier, Checkout
+
+
+class OccupancyMatrix:
+    """
+    Dense slot by slot picture of a finished schedule, for staffing numbers and reports.
+    Row i of cashier_states is the state of cashiers[i] at the start of every slot, and
+    the checkout matrices tell which checkouts are open and staffed at the start of every
+    slot, so per-slot counts are column sums instead of walks over the object graph.
+    Needs NumPy.
+    """
+    OFF_SHIFT = 0
+    FREE = 1
+    OWN_BREAK = 2
+    RELIEVING = 3
+    AT_CHECKOUT = 4
+    STATE_NAMES = ("off_shift", "free", "own_break", "relieving", "at_checkout")
+
+    def __init__(self, cashiers: List["Cashier"], checkouts: List["Checkout"], slot_minutes: int = SLOT_MINUTES) -> None:
+        np = import_numpy("OccupancyMatrix")
+        if slot_minutes <= 0:
+            raise ValueError("slot_minutes must be positive")
+        self.cashiers = cashiers
+        self.checkouts = checkouts
+        self.slot_minutes = slot_minutes
+
+        boundaries = [c.schedule.boundary_interval for c in cashiers] + [c.schedule.boundary_interval for c in checkouts]
+        if boundaries:
+            self.first_slot_start = min(b.start_time for b in boundaries) // slot_minutes * slot_minutes
+            slot_count = self._slot_index(max(b.end_time for b in boundaries))
+        else:
+            self.first_slot_start = 0
+            slot_count = 0
+
+        self.cashier_states = np.full((len(cashiers), slot_count), self.OFF_SHIFT, dtype=np.uint8)
+        for row, cashier in zip(self.cashier_states, cashiers):
+            row[self._slots(cashier.schedule.boundary_interval)] = self.FREE
+            for event in cashier.schedule.all_events:
+                if isinstance(event, BreakAssignment):
+                    row[self._slots(event)] = self.OWN_BREAK if event.cashier is cashier else self.RELIEVING
+                elif isinstance(event, CheckoutAssignment):
+                    row[self._slots(event)] = self.AT_CHECKOUT
+
+        self.checkout_open = np.zeros((len(checkouts), slot_count), dtype=bool)
+        self.checkout_staffed = np.zeros((len(checkouts), slot_count), dtype=bool)
+        for index, checkout in enumerate(checkouts):
+            self.checkout_open[index, self._slots(checkout.schedule.boundary_interval)] = True
+            for event in checkout.schedule.all_events:
+                # A break nobody relieves leaves the checkout closed
+                if isinstance(event, CheckoutAssignment) or (isinstance(event, BreakAssignment) and event.tauottaja):
+                    self.checkout_staffed[index, self._slots(event)] = True
+        self.checkout_mandatory = np.array([checkout.is_mandatory_open for checkout in checkouts], dtype=bool)
+        self.checkout_tobacco = np.array([checkout.is_tobacco_checkout for checkout in checkouts], dtype=bool)
+
+    @classmethod
+    def from_data_manager(cls, data_manager: "DataManager", slot_minutes: int = SLOT_MINUTES) -> "OccupancyMatrix":
+        """Builds the matrices from the cashiers and checkouts loaded into a DataManager."""
+        return cls(data_manager.cashiers, data_manager.checkouts, slot_minutes)
+
+    def _slot_index(self, minute: int) -> int:
+        """Index of the first slot starting at or after minute."""
+        return -(-(minute - self.first_slot_start) // self.slot_minutes)
+
+    def _slots(self, interval) -> slice:
+        """The slots whose start falls inside the interval."""
+        return slice(self._slot_index(interval.start_time), self._slot_index(interval.end_time))
+
+    @property
+    def slot_count(self) -> int:
+        return self.cashier_states.shape[1]
+
+    def slot_start_times(self) -> "np.ndarray":
+        """Start time of every slot as minutes from the day origin."""
+        np = import_numpy("OccupancyMatrix")
+        return self.first_slot_start + self.slot_minutes * np.arange(self.slot_count)
+
+    def state_counts(self) -> "np.ndarray":
+        """(state, slot) matrix of how many cashiers are in each state, indexed by the state constants."""
+        np = import_numpy("OccupancyMatrix")
+        return np.stack([(self.cashier_states == state).sum(axis=0) for state in range(len(self.STATE_NAMES))])
+
+    def available_headcount(self) -> "np.ndarray":
+        """Cashiers on shift and not on their own break, per slot."""
+        states = self.cashier_states
+        return ((states != self.OFF_SHIFT) & (states != self.OWN_BREAK)).sum(axis=0)
+
+    def open_checkout_counts(self) -> "np.ndarray":
+        """Checkouts within their opening hours, per slot."""
+        return self.checkout_open.sum(axis=0)
+
+    def staffed_checkout_counts(self) -> "np.ndarray":
+        """Checkouts with a cashier or a tauottaja in them, per slot."""
+        return (self.checkout_open & self.checkout_staffed).sum(axis=0)
+
+    def coverage_gaps(self) -> "np.ndarray":
+        """(checkout, slot) matrix that is True where a mandatory checkout is open but nobody is in it."""
+        return self.checkout_open & self.checkout_mandatory[:, None] & ~self.checkout_staffed
+
+    def utilization(self) -> "np.ndarray":
+        """Share of each cashier's on-shift slots spent in a checkout or relieving; 0 for cashiers without a shift."""
+        np = import_numpy("OccupancyMatrix")
+        states = self.cashier_states
+        working = ((states == self.AT_CHECKOUT) | (states == self.RELIEVING)).sum(axis=1)
+        on_shift = (states != self.OFF_SHIFT).sum(axis=1)
+        return np.divide(working, on_shift, out=np.zeros(len(self.cashiers)), where=on_shift > 0)
+
+    def gap_spans(self) -> List[Tuple[str, int, int]]:
+        """(checkout identifier, start_time, end_time) of every run of coverage gap slots."""
+        np = import_numpy("OccupancyMatrix")
+        gaps = self.coverage_gaps()
+        # Pad with closed slots so every run has a rising and a falling edge
+        padded = np.zeros((gaps.shape[0], gaps.shape[1] + 2), dtype=np.int8)
+        padded[:, 1:-1] = gaps
+        edges = np.diff(padded, axis=1)
+        starts = self.slot_start_times()
+        spans = []
+        for index, checkout in enumerate(self.checkouts):
+            for first, last in zip(np.flatnonzero(edges[index] == 1), np.flatnonzero(edges[index] == -1)):
+                spans.append((
+                    checkout.identifier,
+                    int(starts[first]),
+                    int(self.first_slot_start + last * self.slot_minutes),
+                ))
+        return spans
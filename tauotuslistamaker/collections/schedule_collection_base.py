@@ -1,9 +1,10 @@
-from datetime import datetime
+import bisect
 from . import TimeIntervalCollection
-from copy import deepcopy
+from .schedule_snapshot import ScheduleSnapshot
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Optional 
+from typing import TYPE_CHECKING, Optional, Sequence
 from ..models import TimeInterval 
+from ..utils import SLOT_MINUTES, instrumentation, is_slot_aligned, span_to_slot_mask
 
 if TYPE_CHECKING:
     from ..models import AvailableInterval
@@ -13,37 +14,102 @@ class ScheduleCollectionBase(ABC):
     def __init__(self, boundary_interval: "TimeInterval"):
         self.boundary_interval = boundary_interval
         self.intervals = TimeIntervalCollection()
-        self._availability: Optional[list["AvailableInterval"]] = None
+        # Free gaps between events, built on first read and then kept current by every mutation. Once built,
+        # the list is only ever changed in place, so views handed out over it (Cashier.availability) stay current.
+        self._availability: list["AvailableInterval"] = []
+        self._availability_valid = False
+        self._availability_starts: list[int] = []
+        # Bumped by every mutation, so snapshots can tell whether the schedule changed under them
+        self.version = 0
 
     @property
     def all_events(self):
         return self.intervals.intervals
     
     @abstractmethod
-    def _wrap_availability(self, interval: "TimeInterval") -> "AvailableInterval":
+    def _wrap_availability(self, start_time: int, end_time: int) -> "AvailableInterval":
         pass
 
+    def snapshot(self) -> ScheduleSnapshot:
+        """Copy-on-write branch of this schedule for simulations, see ScheduleSnapshot."""
+        instrumentation.count("schedule_snapshots")
+        return ScheduleSnapshot(self)
+
+    def _interval_added(self, interval: "TimeInterval") -> None:
+        """Hook for subclasses that keep extra indexes over the events."""
+
+    def _interval_removed(self, interval: "TimeInterval") -> None:
+        """Hook for subclasses that keep extra indexes over the events."""
+
     @property
     def availability(self) -> list["AvailableInterval"]:
-        if self._availability is not None:
-            return self._availability
-        else:
-            calculated_availability = [deepcopy(self.boundary_interval)]
-            
-            for time_interval in self.all_events:
-                new_availability = []
-                for available_interval in calculated_availability:
-                    if available_interval.contains(time_interval):
-                        non_overlapping_parts = available_interval.subtract(time_interval)
-                        new_availability.extend(non_overlapping_parts)
-                    else:
-                        new_availability.append(available_interval)
-                calculated_availability = new_availability
-
-            final_availability = [self._wrap_availability(interval) for interval in calculated_availability]
-            
-            self._availability = final_availability
-            return self._availability
+        if not self._availability_valid:
+            self._build_availability()
+        return self._availability
+
+    def _build_availability(self) -> None:
+        """Computes the free gaps from scratch in one sweep over the sorted events."""
+        instrumentation.count("availability_rebuilds")
+        availability = []
+        cursor = self.boundary_interval.start_time
+
+        for time_interval in self.all_events:
+            if time_interval.start_time > cursor:
+                availability.append(self._wrap_availability(cursor, time_interval.start_time))
+            cursor = max(cursor, time_interval.end_time)
+
+        if cursor < self.boundary_interval.end_time:
+            availability.append(self._wrap_availability(cursor, self.boundary_interval.end_time))
+
+        self._availability[:] = availability
+        self._availability_starts = [gap.start_time for gap in availability]
+        self._availability_valid = True
+
+    def availability_mask(self, slot_minutes: int = SLOT_MINUTES) -> Optional[int]:
+        """Free time as a bitmask of slots (see span_to_slot_mask), or None if a gap is not slot aligned."""
+        mask = 0
+        for gap in self.availability:
+            if not (is_slot_aligned(gap.start_time, slot_minutes) and is_slot_aligned(gap.end_time, slot_minutes)):
+                return None
+            mask |= span_to_slot_mask(gap.start_time, gap.end_time, slot_minutes)
+        return mask
+
+    def _claim_free_time(self, start_time: int, end_time: int) -> None:
+        """Splits the free gap holding [start_time, end_time) around the newly occupied time."""
+        if not self._availability_valid:
+            return
+        index = bisect.bisect_right(self._availability_starts, start_time) - 1
+        if index < 0 or self._availability[index].end_time < end_time:
+            # The time was not free, so the gaps can no longer be patched; rebuild them
+            self._build_availability()
+            return
+
+        gap = self._availability[index]
+        pieces = []
+        if gap.start_time < start_time:
+            pieces.append(self._wrap_availability(gap.start_time, start_time))
+        if end_time < gap.end_time:
+            pieces.append(self._wrap_availability(end_time, gap.end_time))
+
+        self._availability[index:index + 1] = pieces
+        self._availability_starts[index:index + 1] = [piece.start_time for piece in pieces]
+
+    def _release_free_time(self, start_time: int, end_time: int) -> None:
+        """Returns [start_time, end_time) to the free gaps, coalescing with touching neighbours."""
+        if not self._availability_valid:
+            return
+        index = bisect.bisect_left(self._availability_starts, start_time)
+        first, last = index, index
+
+        if index > 0 and self._availability[index - 1].end_time == start_time:
+            first -= 1
+            start_time = self._availability[first].start_time
+        if index < len(self._availability) and self._availability[index].start_time == end_time:
+            last += 1
+            end_time = self._availability[index].end_time
+
+        self._availability[first:last] = [self._wrap_availability(start_time, end_time)]
+        self._availability_starts[first:last] = [start_time]
 
     def add_interval(self, interval: "TimeInterval") -> None:
         if not isinstance(interval, TimeInterval):
@@ -51,7 +117,15 @@ class ScheduleCollectionBase(ABC):
         if not self.boundary_interval.contains(interval):
             raise ValueError("Interval must be within the boundary interval")
         self.intervals.add_interval(interval)
-        self._availability = None
+        self._claim_free_time(interval.start_time, interval.end_time)
+        self._interval_added(interval)
+        self.version += 1
+
+    def interval_extended(self, interval: "TimeInterval", previous_end_time: int) -> None:
+        """Keeps the free gaps current after an interval in this schedule grew past previous_end_time."""
+        if interval.end_time > previous_end_time:
+            self._claim_free_time(previous_end_time, interval.end_time)
+        self.version += 1
 
     def can_add_interval(self, interval: "TimeInterval") -> bool:
         if not isinstance(interval, TimeInterval):
@@ -67,37 +141,93 @@ class ScheduleCollectionBase(ABC):
         """
         Attempts to move an existing interval by a number of minutes.
         Performs validation against boundaries and conflicts.
+        Without commit nothing is mutated and the shifted position is returned
+        as a plain TimeInterval.
         """
         if not isinstance(original_interval, TimeInterval) or not isinstance(minutes_to_move, int):
             raise ValueError("Invalid argument types.")
         
+        shifted_span = self.can_move_interval(original_interval, minutes_to_move)
+        if shifted_span is None:
+            return False, original_interval
+
+        if not commit:
+            return True, TimeInterval(*shifted_span)
+
         self.intervals.remove_interval(original_interval)
+        self._release_free_time(original_interval.start_time, original_interval.end_time)
+        self._interval_removed(original_interval)
+        original_interval.move_by_minutes(minutes_to_move)
+        self.intervals.add_interval(original_interval)
+        self._claim_free_time(original_interval.start_time, original_interval.end_time)
+        self._interval_added(original_interval)
+        self.version += 1
+        return True, original_interval
 
-        # Create the new interval and check rules
-        check_interval = deepcopy(original_interval)
-        check_interval.move_by_minutes(minutes_to_move)
+    def can_move_interval(self, interval: "TimeInterval", minutes_to_move: int) -> Optional[tuple[int, int]]:
+        """
+        Side-effect free check whether an interval of this schedule could be moved.
+        Returns the shifted (start_time, end_time) or None if it would not fit.
+        """
+        instrumentation.count("move_probes")
+        # Validates that the interval belongs to this schedule
+        self.intervals.find_interval_index(interval)
+        start_time = interval.start_time + minutes_to_move
+        end_time = interval.end_time + minutes_to_move
+        if not self.boundary_interval.contains_span(start_time, end_time):
+            return None
+        if not self.intervals.can_add_span(start_time, end_time, ignore=interval):
+            return None
+        return start_time, end_time
 
-        if not self.boundary_interval.contains(check_interval) or not self.intervals.can_add_interval(check_interval):
-            self.intervals.add_interval(original_interval)
-            return False, original_interval
+    def feasible_moves(self, interval: "TimeInterval", offsets: Sequence[int]) -> list[tuple[int, int, int]]:
+        """
+        Batched can_move_interval: evaluates every offset in one pass and returns
+        (offset, start_time, end_time) for the ones that fit, in the given order.
+        """
+        instrumentation.count("move_probes", len(offsets))
+        index = self.intervals.find_interval_index(interval)
+        events = self.intervals.intervals
+
+        # Free span around the interval itself; any shift staying inside it fits without further lookups
+        span_start = self.boundary_interval.start_time
+        if index > 0:
+            span_start = max(span_start, events[index - 1].end_time)
+        span_end = self.boundary_interval.end_time
+        if index + 1 < len(events):
+            span_end = min(span_end, events[index + 1].start_time)
 
-        # Commit or rollback
-        if commit:
-            original_interval.move_by_minutes(minutes_to_move)
-            self.intervals.add_interval(original_interval)
-            self._availability = None 
-            return True, original_interval
-        else:
-            self.intervals.add_interval(original_interval)
-            return True, check_interval
+        moves = []
+        for offset in offsets:
+            start_time = interval.start_time + offset
+            end_time = interval.end_time + offset
+            if span_start <= start_time and end_time <= span_end:
+                moves.append((offset, start_time, end_time))
+            elif (self.boundary_interval.contains_span(start_time, end_time)
+                  and self.intervals.can_add_span(start_time, end_time, ignore=interval)):
+                # Large shifts may jump over a neighbour into another free gap
+                moves.append((offset, start_time, end_time))
+        return moves
     
     def remove_interval(self, interval: "TimeInterval") -> None:
         if not isinstance(interval, TimeInterval):
             raise ValueError("Interval must be a TimeInterval object")
         self.intervals.remove_interval(interval)
-        self._availability = None 
+        self._release_free_time(interval.start_time, interval.end_time)
+        self._interval_removed(interval)
+        self.version += 1
+
+    def set_boundary(self, boundary_interval: "TimeInterval") -> None:
+        """Replaces the boundary interval, e.g. when a shift changes. Every interval must stay within it."""
+        if not isinstance(boundary_interval, TimeInterval):
+            raise ValueError("Boundary must be a TimeInterval object")
+        if not all(boundary_interval.contains(interval) for interval in self.all_events):
+            raise ValueError("Every interval must stay within the new boundary interval")
+        self.boundary_interval = boundary_interval
+        if self._availability_valid:
+            self._build_availability()
+        self.version += 1
 
-    
     def is_within_boundary(self, interval: "TimeInterval") -> bool:
         """Check if the given interval is within the boundary interval."""
         if not isinstance(interval, TimeInterval):
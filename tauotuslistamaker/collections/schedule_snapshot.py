@@ -0,0 +1,234 @@
+import heapq
+from copy import copy
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from ..models import TimeInterval
+from ..utils import SLOT_MINUTES, instrumentation, is_slot_aligned, span_to_slot_mask
+from .time_interval_collection import TimeIntervalCollection
+
+if TYPE_CHECKING:
+    from ..models import AvailableInterval
+    from .schedule_collection_base import ScheduleCollectionBase
+
+
+class ScheduleSnapshot:
+    """
+    Copy-on-write branch of a schedule for simulations. The snapshot shares every
+    interval with the schedule and only records what changed on top of it, so taking
+    one is O(1) and a change is checked with bisect lookups in the schedule and in
+    the changes. Reads of the whole snapshot (all_events, availability) merge the
+    schedule with the changes, which is O(n). Neither the schedule nor the shared
+    intervals are touched until commit(), which applies all the changes at once;
+    throwing the snapshot away (or calling discard()) leaves no trace.
+    """
+
+    def __init__(self, schedule: "ScheduleCollectionBase") -> None:
+        self.schedule = schedule
+        self._reset()
+
+    def _reset(self) -> None:
+        self._base_version = self.schedule.version
+        # ids of the schedule's intervals that are removed or moved in the snapshot
+        self._hidden: set[int] = set()
+        # Intervals added in the snapshot, including the moved copies of shared intervals
+        self._added = TimeIntervalCollection()
+        # id of a moved interval -> its moved copy in self._added
+        self._moved: Dict[int, TimeInterval] = {}
+        # ("add" | "remove" | "move", interval, minutes_to_move) in the order they were made, replayed by commit
+        self._changes: List[Tuple[str, TimeInterval, int]] = []
+        self._availability: Optional[list["AvailableInterval"]] = None
+
+    @property
+    def boundary_interval(self) -> TimeInterval:
+        return self.schedule.boundary_interval
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self._changes)
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the schedule changed after the snapshot was taken, which makes commit() impossible."""
+        return self.schedule.version != self._base_version
+
+    @property
+    def all_events(self) -> list[TimeInterval]:
+        """Every interval as seen in the snapshot, in time order."""
+        shared = (
+            interval for interval in self.schedule.all_events
+            if id(interval) not in self._hidden
+        )
+        return list(heapq.merge(shared, self._added.intervals, key=lambda interval: interval.start_time))
+
+    @property
+    def availability(self) -> list["AvailableInterval"]:
+        """Free gaps as seen in the snapshot, built on first read after a change."""
+        if self._availability is None:
+            instrumentation.count("availability_rebuilds")
+            availability = []
+            cursor = self.boundary_interval.start_time
+            for interval in self.all_events:
+                if interval.start_time > cursor:
+                    availability.append(self.schedule._wrap_availability(cursor, interval.start_time))
+                cursor = max(cursor, interval.end_time)
+            if cursor < self.boundary_interval.end_time:
+                availability.append(self.schedule._wrap_availability(cursor, self.boundary_interval.end_time))
+            self._availability = availability
+        return self._availability
+
+    def availability_mask(self, slot_minutes: int = SLOT_MINUTES) -> Optional[int]:
+        """Free time as a bitmask of slots, see ScheduleCollectionBase.availability_mask."""
+        mask = 0
+        for gap in self.availability:
+            if not (is_slot_aligned(gap.start_time, slot_minutes) and is_slot_aligned(gap.end_time, slot_minutes)):
+                return None
+            mask |= span_to_slot_mask(gap.start_time, gap.end_time, slot_minutes)
+        return mask
+
+    def current(self, interval: TimeInterval) -> TimeInterval:
+        """
+        The interval as it is in the snapshot: the interval itself, or its moved copy
+        if it was moved in the snapshot. Raises ValueError if it is not in the snapshot.
+        """
+        moved = self._moved.get(id(interval))
+        if moved is not None:
+            return moved
+        if self._is_added(interval):
+            return interval
+        if id(interval) in self._hidden:
+            raise ValueError("Interval not found in the snapshot")
+        self.schedule.intervals.find_interval_index(interval)
+        return interval
+
+    def _is_added(self, interval: TimeInterval) -> bool:
+        try:
+            self._added.find_interval_index(interval)
+            return True
+        except ValueError:
+            return False
+
+    def _hide(self, interval: TimeInterval) -> None:
+        """Takes the interval, or its moved copy, out of the snapshot."""
+        visible = self.current(interval)
+        if self._is_added(visible):
+            self._added.remove_interval(visible)
+        else:
+            self._hidden.add(id(interval))
+        self._moved.pop(id(interval), None)
+
+    def can_add_span(self, start_time: int, end_time: int, ignore: Optional[TimeInterval] = None) -> bool:
+        """Checks if [start_time, end_time) could be added to the snapshot, treating ignore as absent."""
+        if not self.boundary_interval.contains_span(start_time, end_time):
+            return False
+        if not self._added.can_add_span(start_time, end_time, ignore=ignore):
+            return False
+
+        return all(
+            interval is ignore or id(interval) in self._hidden
+            for interval in self.schedule.intervals.overlapping_span(start_time, end_time)
+        )
+
+    def can_add_interval(self, interval: TimeInterval) -> bool:
+        if not isinstance(interval, TimeInterval):
+            raise ValueError("Interval must be a TimeInterval object")
+        return self.can_add_span(interval.start_time, interval.end_time)
+
+    def add_interval(self, interval: TimeInterval) -> None:
+        if not isinstance(interval, TimeInterval):
+            raise ValueError("Interval must be a TimeInterval object")
+        if not self.boundary_interval.contains(interval):
+            raise ValueError("Interval must be within the boundary interval")
+        if not self.can_add_span(interval.start_time, interval.end_time):
+            raise ValueError("Interval overlaps with existing intervals")
+        self._added.add_interval(interval)
+        self._changes.append(("add", interval, 0))
+        self._availability = None
+
+    def remove_interval(self, interval: TimeInterval) -> None:
+        if not isinstance(interval, TimeInterval):
+            raise ValueError("Interval must be a TimeInterval object")
+        self._hide(interval)
+        self._changes.append(("remove", interval, 0))
+        self._availability = None
+
+    def can_move_interval(self, interval: TimeInterval, minutes_to_move: int) -> Optional[tuple[int, int]]:
+        """Side-effect free check whether an interval could be moved in the snapshot, see ScheduleCollectionBase."""
+        instrumentation.count("move_probes")
+        visible = self.current(interval)
+        start_time = visible.start_time + minutes_to_move
+        end_time = visible.end_time + minutes_to_move
+        if not self.can_add_span(start_time, end_time, ignore=visible):
+            return None
+        return start_time, end_time
+
+    def feasible_moves(self, interval: TimeInterval, offsets: Sequence[int]) -> list[tuple[int, int, int]]:
+        """(offset, start_time, end_time) for every offset the interval could move by in the snapshot."""
+        moves = []
+        for offset in offsets:
+            shifted_span = self.can_move_interval(interval, offset)
+            if shifted_span is not None:
+                moves.append((offset, *shifted_span))
+        return moves
+
+    def try_move_interval(self,
+                          interval: TimeInterval,
+                          minutes_to_move: int,
+                          commit: bool = True) -> tuple[bool, Optional[TimeInterval]]:
+        """
+        Moves an interval in the snapshot, see ScheduleCollectionBase.try_move_interval.
+        The interval itself is never mutated: the snapshot moves a shallow copy of it,
+        which is what current() returns from then on.
+        """
+        if not isinstance(interval, TimeInterval) or not isinstance(minutes_to_move, int):
+            raise ValueError("Invalid argument types.")
+        shifted_span = self.can_move_interval(interval, minutes_to_move)
+        if shifted_span is None:
+            return False, interval
+        if not commit:
+            return True, TimeInterval(*shifted_span)
+
+        moved = copy(self.current(interval))
+        instrumentation.count("interval_copies")
+        moved.move_by_minutes(minutes_to_move)
+        self._hide(interval)
+        self._added.add_interval(moved)
+        self._moved[id(interval)] = moved
+        self._changes.append(("move", interval, minutes_to_move))
+        self._availability = None
+        return True, moved
+
+    def discard(self) -> None:
+        """Drops every change made in the snapshot."""
+        self._reset()
+
+    def commit(self) -> None:
+        """
+        Applies the changes of the snapshot to the schedule, all or nothing. Raises
+        ValueError if the schedule was changed after the snapshot was taken.
+        """
+        if self.is_stale:
+            raise ValueError("The schedule changed after the snapshot was taken")
+
+        applied = []
+        try:
+            for change, interval, minutes_to_move in self._changes:
+                if change == "add":
+                    self.schedule.add_interval(interval)
+                elif change == "remove":
+                    self.schedule.remove_interval(interval)
+                else:
+                    success, _ = self.schedule.try_move_interval(interval, minutes_to_move, commit=True)
+                    if not success:
+                        raise ValueError("Interval could not be moved")
+                applied.append((change, interval, minutes_to_move))
+        except ValueError:
+            # Undo in reverse order so the schedule is exactly as it was
+            for change, interval, minutes_to_move in reversed(applied):
+                if change == "add":
+                    self.schedule.remove_interval(interval)
+                elif change == "remove":
+                    self.schedule.add_interval(interval)
+                else:
+                    self.schedule.try_move_interval(interval, -minutes_to_move, commit=True)
+            raise
+        self._reset()
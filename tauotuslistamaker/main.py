@@ -1,27 +1,83 @@
-from .managers import DataManager, BreakManager, CheckoutManager
+import argparse
+import json
+from dataclasses import asdict
+from pathlib import Path
 
+from .managers import DataManager, BreakManager, CheckoutManager, DecisionTrace, ResultCache
+from .utils import format_minutes, instrumentation, minutes_to_datetime
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Creates the breaks list and checkout schedule of a store.")
+    parser.add_argument("--profile", type=Path, metavar="STATS_JSON",
+                        help="time every phase, count the hot paths and write the stats report as json to this file")
+    parser.add_argument("--cprofile", type=Path, metavar="DIR",
+                        help="with --profile, also write a cProfile of every phase to this directory")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="with --profile, also record the peak traced memory of every phase")
+    parser.add_argument("--trace", type=Path, metavar="TRACE_TXT",
+                        help="record the scheduling decisions and write the last ones to this file")
+    parser.add_argument("--cache", type=Path, metavar="DIR",
+                        help="reuse the result of an earlier run with the same inputs from this directory")
+    args = parser.parse_args(argv)
+    if (args.cprofile or args.trace_memory) and not args.profile:
+        parser.error("--cprofile and --trace-memory need --profile")
+    if args.cache and (args.trace or args.profile):
+        # A cache hit runs neither manager, so there would be nothing to trace or profile
+        parser.error("--cache cannot be combined with --trace or --profile")
+    return args
+
+
+def write_stats_report(path, data_manager, break_manager):
+    report = instrumentation.report()
+    report["cashiers"] = len(data_manager.cashiers)
+    report["checkouts"] = len(data_manager.checkouts)
+    report["simulation_cache"] = {**asdict(break_manager.cache_stats), "hit_rate": break_manager.cache_stats.hit_rate}
+    with open(path, "w") as json_file:
+        json.dump(report, json_file, indent=4)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile:
+        instrumentation.enable(profile=args.cprofile is not None, trace_memory=args.trace_memory)
 
-def main():
     data_manager = DataManager()
     data_manager.load_data("cashiers.json")
     data_manager.load_config("config.json")
     cashiers = data_manager.cashiers
-    config = data_manager.config
+    config = data_manager.compiled_config
     all_breaks = data_manager.all_breaks
     checkouts = data_manager.checkouts
-    break_manager = BreakManager(cashiers, all_breaks)
-    break_manager.generate_breaks_list()
-    checkout_manager = CheckoutManager(cashiers, checkouts, config)
-    checkout_manager.assign_checkouts_to_cashiers()
-    checkouts = data_manager.checkouts
+    trace = DecisionTrace() if args.trace else None
+    break_manager = BreakManager(cashiers, all_breaks, trace=trace)
+    checkout_manager = CheckoutManager(cashiers, checkouts, config, trace=trace)
+    if args.cache:
+        ResultCache(args.cache).run(break_manager, checkout_manager)
+    else:
+        break_manager.generate_breaks_list()
+        checkout_manager.assign_checkouts_to_cashiers()
+
+    if args.profile:
+        instrumentation.disable()
+        write_stats_report(args.profile, data_manager, break_manager)
+        if args.cprofile:
+            instrumentation.dump_profiles(args.cprofile)
+    if trace is not None:
+        with open(args.trace, "w") as trace_file:
+            trace.dump(trace_file)
+
+    print_schedules(break_manager, cashiers, checkouts)
+
 
+def print_schedules(break_manager, cashiers, checkouts):
     # Print breaks list schedule
     print("\n\n--- Breaks List Schedule ---")
     for i, assignment in enumerate(break_manager.breaks_schedule_list, 1):
         tauottaja_name = assignment['tauottaja'].name if assignment['tauottaja'] else "None"
         print(f"Tauottaja {i}: {tauottaja_name} (total_minutes={assignment['total_minutes']})")
         for break_item in assignment['breaks_covered']:
-            print(f"  - covers: {break_item.cashier.name} | {break_item.start_time} -> {break_item.end_time}")
+            print(f"  - covers: {break_item.cashier.name} | {minutes_to_datetime(break_item.start_time)} -> {minutes_to_datetime(break_item.end_time)}")
 
     # Print each cashier's individual schedule
     print("\n\n--- All Cashiers' Personal Schedules ---")
@@ -46,9 +102,9 @@ def main():
                         event_type = "Break"
                 elif event_type == "CheckoutAssignment":
                     event_type = "Checkout at " + (event.checkout.identifier if event.checkout else "Unknown Checkout")
-                start_time = event.start_time.strftime("%H:%M")
-                end_time = event.end_time.strftime("%H:%M")
-                duration = (event.end_time - event.start_time).total_seconds() / 60
+                start_time = format_minutes(event.start_time)
+                end_time = format_minutes(event.end_time)
+                duration = event.duration_minutes
                 print(f"     {idx}. {start_time}-{end_time} ({duration:.0f} min) - {event_type}")
     print("\n--- End of Cashiers' Schedules ---")
 
@@ -74,9 +130,9 @@ def main():
                 print("   Assignments:")
                 for assignment in checkout.schedule.all_events:
                     cashier_name = assignment.cashier.name if hasattr(assignment, 'cashier') and assignment.cashier else "None"
-                    start_time = assignment.start_time.strftime("%H:%M")
-                    end_time = assignment.end_time.strftime("%H:%M")
-                    duration = (assignment.end_time - assignment.start_time).total_seconds() / 60
+                    start_time = format_minutes(assignment.start_time)
+                    end_time = format_minutes(assignment.end_time)
+                    duration = assignment.duration_minutes
                     assignment_type = type(assignment).__name__
                     if assignment_type == "BreakAssignment":
                         assignment_type = "Break"
@@ -1,3 +1,6 @@
 from .break_manager import BreakManager
 from .data_manager import DataManager
-from .checkout_manager import CheckoutManager
\ No newline at end of file
+from .checkout_manager import CheckoutManager
+from .decision_trace import DecisionTrace
+from .result_cache import ResultCache
+from .replanner import Replanner, ReplanResult, CashierAbsent, ShiftChanged, CashierAdded
\ No newline at end of file
@@ -1,8 +1,14 @@
 from __future__ import annotations
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List, Dict, Tuple, Any, TYPE_CHECKING
-from ..utils import time_diff_in_minutes
+from itertools import chain, repeat
+from typing import List, Dict, Iterable, NamedTuple, Optional, Sequence, Set, Tuple, Union, Any, TYPE_CHECKING
+from ..collections import BreakPool
+from ..models import TimeInterval
+from ..utils import hour_of_day, import_numpy, instrumentation, is_slot_aligned, span_to_slot_mask
+from . import decision_trace, vectorized_coverage
+from .decision_trace import DecisionTrace
 
 if TYPE_CHECKING:
     from ..models import Cashier, BreakAssignment 
@@ -14,7 +20,227 @@ class AssignmentCandidate:
     cashier: "Cashier"
     total_minutes_covered: int = 0
     # Stores the list of tuples: (original_break, shifted_time_interval)
-    assignments_to_commit: List[Tuple["BreakAssignment", "BreakAssignment"]] = field(default_factory=list)
+    assignments_to_commit: List[Tuple["BreakAssignment", "TimeInterval"]] = field(default_factory=list)
+    # ids of every break that could have reached the cashier's free windows at some shift during the simulation.
+    # Breaks outside this set can never change the outcome of the simulation.
+    reachable_breaks: Set[int] = field(default_factory=set)
+
+
+# Counters for the per-cashier simulation cache
+@dataclass
+class SimulationCacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    # Misses answered from the simulation of an equivalent cashier instead of their own
+    shared: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# Scoring constants of a BreakManager, passed along with the snapshot to worker processes
+class CoverageScoring(NamedTuple):
+    consecutive_bonus: float
+    early_bonus: float
+    late_bonus: float
+    early_boundary_hour: int
+    late_boundary_hour: int
+    max_move: int
+
+
+# Read-only view of one unassigned break for a simulation round:
+# (owner_index, start_time, end_time, length_in_minutes, shifted (start_time, end_time) spans that fit the owner's schedule,
+#  slot masks of the shifted spans and slot mask of every slot the break can reach, both None if the round is not slot aligned)
+PoolEntry = Tuple[int, int, int, float, Tuple[Tuple[int, int], ...], Optional[Tuple[int, ...]], Optional[int]]
+
+# Free windows of a cashier, either as a slot bitmask or as (start_time, end_time) spans for non-aligned data
+FreeWindows = Union[int, List[Tuple[int, int]]]
+
+# Result of one simulation: (total_minutes_covered, [(pool_position, start_time, end_time)], reachable pool positions)
+CoverageResult = Tuple[float, List[Tuple[int, int, int]], List[int]]
+
+
+def simulate_coverage(windows: FreeWindows,
+                      pool: List[PoolEntry],
+                      cashier_index: int,
+                      scoring: CoverageScoring,
+                      position_ranges: Optional[Sequence[Tuple[int, int]]] = None) -> CoverageResult:
+    """
+    Simulates fitting all unassigned breaks into one cashier's free windows 
+    using the +/- 30 min flexibility. Works on plain data only, so the same
+    code runs in-process and in worker processes.
+    position_ranges limits the simulation to those [low, high) ranges of the pool
+    (ascending, disjoint); every entry the windows could reach must be included.
+    """
+    if position_ranges is None:
+        positions = range(len(pool))
+    else:
+        positions = chain.from_iterable(range(low, high) for low, high in position_ranges)
+    if isinstance(windows, int):
+        return _simulate_coverage_slots(windows, pool, cashier_index, scoring, positions)
+    return _simulate_coverage_spans(windows, pool, cashier_index, scoring, positions)
+
+
+def _simulate_coverage_slots(free_slots: int,
+                             pool: List[PoolEntry],
+                             cashier_index: int,
+                             scoring: CoverageScoring,
+                             positions: Iterable[int]) -> CoverageResult:
+    """Slot bitmask version of simulate_coverage: fitting is an AND and compare, claiming is an AND NOT."""
+    total_minutes_covered = 0
+    planned = []
+    reachable = []
+    last_assigned_end_time = None
+
+    for position in positions:
+        owner_index, _, _, length, shifted_spans, shifted_masks, reach_mask = pool[position]
+        # Own breaks are never covered by the cashier themselves
+        if owner_index == cashier_index:
+            continue
+
+        # Skip breaks that cannot land in the free windows at any shift
+        if not free_slots & reach_mask:
+            continue
+        reachable.append(position)
+
+        best_shift = None
+        for shift, (_, end_time) in enumerate(shifted_spans):
+            # Tie-breaker: If this new valid shift ends earlier than the current best, select it.
+            if free_slots & shifted_masks[shift] == shifted_masks[shift] and (
+                    best_shift is None or end_time < shifted_spans[best_shift][1]):
+                best_shift = shift
+
+        if best_shift is None:
+            continue
+
+        start_time, end_time = shifted_spans[best_shift]
+        free_slots &= ~shifted_masks[best_shift]
+        planned.append((position, start_time, end_time))
+        total_minutes_covered += length + _coverage_bonus(start_time, end_time, last_assigned_end_time, scoring)
+        last_assigned_end_time = end_time
+
+    return total_minutes_covered, planned, reachable
+
+
+def _simulate_coverage_spans(windows: List[Tuple[int, int]],
+                             pool: List[PoolEntry],
+                             cashier_index: int,
+                             scoring: CoverageScoring,
+                             positions: Iterable[int]) -> CoverageResult:
+    """Interval version of simulate_coverage, used when the data is not slot aligned."""
+    total_minutes_covered = 0
+    planned = []
+    reachable = []
+    last_assigned_end_time = None
+
+    for position in positions:
+        owner_index, break_start, break_end, length, shifted_spans, _, _ = pool[position]
+        # Own breaks are never covered by the cashier themselves
+        if owner_index == cashier_index:
+            continue
+
+        # Skip breaks that cannot land in the free windows at any shift
+        reach_start = break_start - scoring.max_move
+        reach_end = break_end + scoring.max_move
+        if not any(window_start < reach_end and window_end > reach_start for window_start, window_end in windows):
+            continue
+        reachable.append(position)
+
+        best_shift_span = None
+        for start_time, end_time in shifted_spans:
+            is_available = any(
+                window_start <= start_time and end_time <= window_end for window_start, window_end in windows
+            )
+            # Tie-breaker: If this new valid shift ends earlier than the current best, select it.
+            if is_available and (best_shift_span is None or end_time < best_shift_span[1]):
+                best_shift_span = (start_time, end_time)
+
+        if best_shift_span is None:
+            continue
+
+        # Subtract the block from all windows it overlaps
+        start_time, end_time = best_shift_span
+        new_windows = []
+        for window_start, window_end in windows:
+            if window_start < end_time and window_end > start_time:
+                if window_start < start_time:
+                    new_windows.append((window_start, start_time))
+                if window_end > end_time:
+                    new_windows.append((end_time, window_end))
+            else:
+                new_windows.append((window_start, window_end))
+        windows = new_windows
+
+        planned.append((position, start_time, end_time))
+        total_minutes_covered += length + _coverage_bonus(start_time, end_time, last_assigned_end_time, scoring)
+        last_assigned_end_time = end_time
+
+    return total_minutes_covered, planned, reachable
+
+
+def _coverage_bonus(start_time: int, end_time: int, last_assigned_end_time: Optional[int], scoring: CoverageScoring) -> float:
+    bonus = 0
+    if start_time == last_assigned_end_time:
+        bonus = scoring.consecutive_bonus
+    if hour_of_day(end_time) < scoring.early_boundary_hour:
+        bonus += scoring.early_bonus
+    elif hour_of_day(start_time) >= scoring.late_boundary_hour:
+        bonus += scoring.late_bonus
+    return bonus
+
+
+def _equivalent_shifts(pool: List[PoolEntry],
+                        representative_positions: List[int],
+                        member_positions: List[int]) -> Optional[List[Tuple[int, int, int]]]:
+    """
+    How to turn the simulation of a representative cashier into the simulation of a member
+    with the same free windows and identical own breaks, as (low, high, delta): pool
+    positions in [low, high) of the representative's result move by delta.
+    The member only sees the same sequence of breaks when every entry between each pair
+    of matching own breaks is identical to them, otherwise returns None.
+    """
+    shifts = []
+    for representative_position, member_position in zip(representative_positions, member_positions):
+        low = min(representative_position, member_position)
+        high = max(representative_position, member_position)
+        entry = pool[member_position][1:]
+        if any(pool[position][1:] != entry for position in range(low + 1, high)):
+            return None
+        if member_position < representative_position:
+            # The representative covers the member's break and everything up to its own one step earlier
+            shifts.append((member_position, representative_position, 1))
+        elif representative_position < member_position:
+            shifts.append((representative_position + 1, member_position + 1, -1))
+    return shifts
+
+
+def _shift_result(result: CoverageResult, shifts: List[Tuple[int, int, int]]) -> CoverageResult:
+    """Moves the pool positions of a simulation result by the shifts of _equivalent_shifts."""
+    def shifted(position: int) -> int:
+        for low, high, delta in shifts:
+            if low <= position < high:
+                return position + delta
+        return position
+
+    total_minutes_covered, planned, reachable = result
+    return (
+        total_minutes_covered,
+        [(shifted(position), start_time, end_time) for position, start_time, end_time in planned],
+        [shifted(position) for position in reachable],
+    )
+
+
+def _simulate_coverage_batch(pool: List[PoolEntry],
+                             scoring: CoverageScoring,
+                             jobs: List[Tuple[int, FreeWindows, List[Tuple[int, int]]]]) -> List[CoverageResult]:
+    """Worker entry point: simulates a batch of (cashier_index, windows, position_ranges) against the same pool."""
+    return [
+        simulate_coverage(windows, pool, cashier_index, scoring, position_ranges)
+        for cashier_index, windows, position_ranges in jobs
+    ]
 
 
 class BreakManager:
@@ -25,68 +251,120 @@ class BreakManager:
     EARLY_BREAK_BOUNDARY_HOUR = 11  # breaks ending before this hour are considered early
     LATE_BREAK_BOUNDARY_HOUR = 20  # breaks starting after this hour are considered late
     REQUIRED_MIN_COVERAGE = 60  # Minimum total minutes a cashier must cover to be considered
+    VALID_SHIFT_MOVES = (-30, -15, 0, 15, 30)  # Tried in this order when fitting a break
     
-    def __init__(self, cashiers: list["Cashier"], all_breaks: List["BreakAssignment"]) -> None:
+    def __init__(self,
+                 cashiers: list["Cashier"],
+                 all_breaks: List["BreakAssignment"],
+                 workers: Optional[int] = None,
+                 vectorized: bool = False,
+                 trace: Optional[DecisionTrace] = None) -> None:
         self.cashiers = cashiers
-        self.all_breaks = all_breaks
+        # Unassigned breaks; iterates in the order they were given, with failed moves going to the back
+        self.all_breaks = BreakPool(all_breaks)
         self.breaks_schedule_list = []
+        # Opt-in: number of worker processes evaluating candidates; None or 1 keeps everything in-process
+        self.workers = workers
+        # Opt-in: simulate all cashiers of a round together with NumPy when the round is slot aligned
+        if vectorized:
+            import_numpy("BreakManager(vectorized=True)")
+        self.vectorized = vectorized
+        # Opt-in: records the reliever chosen in every round
+        self.trace = trace
+        self._cashier_indexes: Dict["Cashier", int] = {cashier: index for index, cashier in enumerate(cashiers)}
+        # Simulation results per cashier, valid until one of their inputs changes
+        self._candidate_cache: Dict["Cashier", AssignmentCandidate] = {}
+        self.cache_stats = SimulationCacheStats()
+        # Shifted spans that fit each break's owner, keyed by break id, valid until the owner's schedule changes nearby
+        self._shifted_spans: Dict[int, Tuple[Tuple[int, int], ...]] = {}
 
+    @instrumentation.timed("generate_breaks_list")
     def generate_breaks_list(self) -> List[Dict[str, Any]]:
         
         available_cashiers: List["Cashier"] = self.cashiers[:]
         final_assignments = []
 
-        while self.all_breaks:
-            best_candidate = self._find_best_cashier_assignment(available_cashiers)
-            
-            if best_candidate and best_candidate.assignments_to_commit:
+        parallel = self.workers is not None and self.workers > 1
+        with (ProcessPoolExecutor(max_workers=self.workers) if parallel else nullcontext()) as executor:
+            while self.all_breaks:
+                with instrumentation.phase("generate_breaks_list.round"):
+                    best_candidate = self._find_best_cashier_assignment(available_cashiers, executor)
                 
-                final_assignments.append({
-                    "tauottaja": best_candidate.cashier,
-                    "breaks_covered": [orig_b for orig_b, shifted_b in best_candidate.assignments_to_commit],
-                    "total_minutes": best_candidate.total_minutes_covered,
-                })
+                    if best_candidate and best_candidate.assignments_to_commit:
+                    
+                        final_assignments.append({
+                            "tauottaja": best_candidate.cashier,
+                            "breaks_covered": [orig_b for orig_b, shifted_b in best_candidate.assignments_to_commit],
+                            "total_minutes": best_candidate.total_minutes_covered,
+                        })
 
-                self.all_breaks = [b for b in self.all_breaks if b.cashier != best_candidate.cashier]
-                                
-                for original_break, shifted_break in best_candidate.assignments_to_commit:
+                        # The reliever's own breaks leave the pool, they are not covered by anyone
+                        removed_breaks = {id(b) for b in self.all_breaks.remove_owner(best_candidate.cashier)}
+                        changed_schedules: Set["Cashier"] = {best_candidate.cashier}
+                        affected_breaks: Set[int] = set()
+                        pool_reordered = False
+                                    
+                        for original_break, shifted_break in best_candidate.assignments_to_commit:
 
-                    break_owner = original_break.cashier
-                    self.all_breaks.remove(original_break)
+                            break_owner = original_break.cashier
+                            self.all_breaks.remove(original_break)
+                            removed_breaks.add(id(original_break))
 
-                    minutes_to_move = time_diff_in_minutes(original_break.start_time, shifted_break.start_time)
-                                        
-                    success, final_break_object = break_owner.try_move_interval(
-                        original_break, minutes_to_move, commit=True
-                    )
+                            minutes_to_move = shifted_break.start_time - original_break.start_time
+                            previous_start_time = original_break.start_time
+                            previous_end_time = original_break.end_time
+                                            
+                            success, final_break_object = break_owner.try_move_interval(
+                                original_break, minutes_to_move, commit=True
+                            )
 
-                    if not success:
-                        self.all_breaks.append(original_break)
-                        continue
+                            if not success:
+                                self.all_breaks.add(original_break)
+                                pool_reordered = True
+                                continue
 
-                    # Assign the covered break to the reliever's schedule and link the reliever
-                    best_candidate.cashier.add_interval(original_break)
-                    original_break.tauottaja = best_candidate.cashier
+                            # Assign the covered break to the reliever's schedule and link the reliever
+                            best_candidate.cashier.add_interval(original_break)
+                            original_break.tauottaja = best_candidate.cashier
+                            changed_schedules.add(break_owner)
+                            affected_breaks.update(self._breaks_near_move(
+                                break_owner,
+                                min(previous_start_time, original_break.start_time),
+                                max(previous_end_time, original_break.end_time),
+                            ))
 
-            else:
-                # Handle unassigned breaks
-                for b in self.all_breaks:
-                    final_assignments.append({
-                        "tauottaja": None,
-                        "breaks_covered": [b],
-                        "total_minutes": b.length_in_minutes()
-                    })
-                break
+                        self._invalidate_candidates(changed_schedules, removed_breaks, affected_breaks, pool_reordered)
+                        if self.trace is not None:
+                            self.trace.record(
+                                decision_trace.ROUND, len(final_assignments), best_candidate.cashier,
+                                best_candidate.total_minutes_covered, len(best_candidate.assignments_to_commit),
+                                len(self.all_breaks),
+                            )
+
+                    else:
+                        # Handle unassigned breaks
+                        if self.trace is not None:
+                            self.trace.record(decision_trace.UNASSIGNED, len(final_assignments) + 1, len(self.all_breaks))
+                        for b in self.all_breaks:
+                            final_assignments.append({
+                                "tauottaja": None,
+                                "breaks_covered": [b],
+                                "total_minutes": b.length_in_minutes()
+                            })
+                        break
 
         self.breaks_schedule_list = final_assignments
         return final_assignments
         
-    def _find_best_cashier_assignment(self, available_cashiers: List["Cashier"]) -> AssignmentCandidate | None:
+    def _find_best_cashier_assignment(self,
+                                      available_cashiers: List["Cashier"],
+                                      executor: Optional[Executor] = None) -> AssignmentCandidate | None:
 
         best_candidate = None
+        self._evaluate_candidates(available_cashiers, executor)
 
         for candidate_cashier in available_cashiers:
-            candidate_result = self._simulate_cashier_coverage(candidate_cashier)
+            candidate_result = self._candidate_cache[candidate_cashier]
             if not candidate_result.assignments_to_commit or candidate_result.total_minutes_covered < self.REQUIRED_MIN_COVERAGE:
                 continue
                 
@@ -101,79 +379,237 @@ class BreakManager:
         
         return best_candidate
 
+    def _evaluate_candidates(self, cashiers: List["Cashier"], executor: Optional[Executor] = None) -> None:
+        """
+        Fills the simulation cache for every cashier whose entry was invalidated.
+        With an executor the simulations run in worker processes on a read-only
+        snapshot; results are keyed by cashier, so the selection stays deterministic.
+        Cashiers equivalent to one simulated in the same call reuse its result.
+        """
+        missing = [cashier for cashier in cashiers if cashier not in self._candidate_cache]
+        self.cache_stats.hits += len(cashiers) - len(missing)
+        self.cache_stats.misses += len(missing)
+        if not missing:
+            return
+
+        pool_breaks, pool, slot_aligned = self._round_pool()
+        scoring = self._scoring()
+        simulated, shared = self._group_equivalent(missing, pool, slot_aligned)
+        self.cache_stats.shared += len(shared)
+        instrumentation.count("coverage_simulations", len(simulated))
+        instrumentation.count("coverage_simulations_shared", len(shared))
+        jobs = [
+            (self._cashier_index(cashier), windows, self._reachable_ranges(cashier))
+            for cashier, windows in simulated
+        ]
+
+        if self.vectorized and slot_aligned and all(isinstance(windows, int) for _, windows, _ in jobs):
+            # Breaks outside every cashier's reachable ranges cannot change any of the results
+            positions = sorted(set(chain.from_iterable(
+                range(low, high) for _, _, position_ranges in jobs for low, high in position_ranges
+            )))
+            results = vectorized_coverage.simulate_coverage_vectorized(
+                [windows for _, windows, _ in jobs], pool, [cashier_index for cashier_index, _, _ in jobs], scoring,
+                positions,
+            )
+        elif executor is not None and len(jobs) > 1:
+            batch_size = -(-len(jobs) // self.workers)
+            batches = [jobs[i:i + batch_size] for i in range(0, len(jobs), batch_size)]
+            results = [
+                result
+                for batch_results in executor.map(_simulate_coverage_batch, repeat(pool), repeat(scoring), batches)
+                for result in batch_results
+            ]
+        else:
+            results = _simulate_coverage_batch(pool, scoring, jobs)
+
+        results_by_cashier = {}
+        for (cashier, _), result in zip(simulated, results):
+            results_by_cashier[cashier] = result
+            self._candidate_cache[cashier] = self._to_candidate(cashier, result, pool_breaks)
+        for cashier, representative, shifts in shared:
+            result = _shift_result(results_by_cashier[representative], shifts)
+            self._candidate_cache[cashier] = self._to_candidate(cashier, result, pool_breaks)
+
+    def _group_equivalent(self,
+                          cashiers: List["Cashier"],
+                          pool: List[PoolEntry],
+                          slot_aligned: bool) -> Tuple[List[Tuple["Cashier", FreeWindows]], List[Tuple["Cashier", "Cashier", List[Tuple[int, int, int]]]]]:
+        """
+        Splits the cashiers into the ones that need a simulation, as (cashier, free_windows),
+        and the ones that can reuse the simulation of an equivalent cashier, as
+        (cashier, representative, shifts). Cashiers on the same shift with the same
+        free windows and identical unassigned own breaks are equivalent.
+        """
+        own_positions: Dict[int, List[int]] = {}
+        for position, entry in enumerate(pool):
+            own_positions.setdefault(entry[0], []).append(position)
+
+        simulated = []
+        shared = []
+        representatives: Dict[Any, Tuple["Cashier", List[int]]] = {}
+        for cashier in cashiers:
+            windows = self._free_windows(cashier, slot_aligned)
+            positions = own_positions.get(self._cashier_index(cashier), [])
+            fingerprint = (
+                windows if isinstance(windows, int) else tuple(windows),
+                tuple(pool[position][1:] for position in positions),
+            )
+            representative = representatives.get(fingerprint)
+            if representative is None:
+                representatives[fingerprint] = (cashier, positions)
+            else:
+                shifts = _equivalent_shifts(pool, representative[1], positions)
+                if shifts is not None:
+                    shared.append((cashier, representative[0], shifts))
+                    continue
+            simulated.append((cashier, windows))
+        return simulated, shared
+
     def _simulate_cashier_coverage(self, cashier: "Cashier") -> AssignmentCandidate:
         """
         Simulates fitting all unassigned breaks into the cashier's schedule 
         using the +/- 30 min flexibility.
         """
-        
-        candidate = AssignmentCandidate(cashier)
-        
-        # 1. CRITICAL: Get the cashier's available time blocks only once.
-        available_windows = cashier.copy_availability()
+        instrumentation.count("coverage_simulations")
+        pool_breaks, pool, slot_aligned = self._round_pool()
+        result = simulate_coverage(
+            self._free_windows(cashier, slot_aligned), pool, self._cashier_index(cashier), self._scoring(),
+            self._reachable_ranges(cashier),
+        )
+        return self._to_candidate(cashier, result, pool_breaks)
 
-        # Filter own breaks out and sort chronologically
-        breaks_to_fit = sorted(
-            [b for b in self.all_breaks if b.cashier is not cashier],
-            key=lambda b: b.start_time
+    def _round_pool(self) -> Tuple[List["BreakAssignment"], List[PoolEntry], bool]:
+        """
+        Sorts the unassigned breaks chronologically and describes them as plain data.
+        Slot masks are only attached when every break and every shift is slot aligned.
+        """
+        pool_breaks = self.all_breaks.in_start_order()
+        max_move = max(abs(move) for move in self.VALID_SHIFT_MOVES)
+        slot_aligned = all(is_slot_aligned(move) for move in self.VALID_SHIFT_MOVES) and all(
+            is_slot_aligned(b.start_time) and is_slot_aligned(b.end_time) for b in pool_breaks
         )
+        pool = []
+        for b in pool_breaks:
+            shifted_spans = self._shifted_spans_of(b, slot_aligned)
+            shifted_masks = reach_mask = None
+            if slot_aligned:
+                shifted_masks = tuple(span_to_slot_mask(start_time, end_time) for start_time, end_time in shifted_spans)
+                reach_mask = span_to_slot_mask(max(0, b.start_time - max_move), b.end_time + max_move)
+            pool.append((
+                self._cashier_index(b.cashier), b.start_time, b.end_time, b.length_in_minutes(),
+                shifted_spans, shifted_masks, reach_mask,
+            ))
+        return pool_breaks, pool, slot_aligned
 
-        valid_shift_moves = [-30, -15, 0, 15, 30]
-        last_assigned_end_time = datetime.min
-        
-        for break_ in breaks_to_fit:
-            
-            best_shift_interval = None
-            best_end_time = datetime.max 
-            
-            for shift_move in valid_shift_moves:
-                
-                # Check 1: Is the shifted time valid in the break owner's schedule?
-                fits_cashiers_break_schedule, new_possible_break = break_.cashier.try_move_interval(
-                    break_, shift_move, commit=False
-                )
-                if not fits_cashiers_break_schedule:
-                    continue
-                
-                is_available = any(
-                    window.contains(new_possible_break) for window in available_windows
-                )
-                
-                if is_available: 
-                    # Tie-breaker: If this new valid shift ends earlier than the current best, select it.
-                    if new_possible_break.end_time < best_end_time:
-                        best_end_time = new_possible_break.end_time
-                        best_shift_interval = new_possible_break
-
-            # Commit the best found shift, if any
-            if best_shift_interval:
-                
-                new_available_windows = []
-                
-                # Iterate and subtract the block from all windows it overlaps
-                for window in available_windows:
-                    try:
-                        non_overlapping_parts = window.subtract(best_shift_interval)
-                        
-                        new_available_windows.extend(
-                            non_overlapping_parts
-                        )
-                    except ValueError:
-                        # If subtraction fails (no overlap), preserve the window.
-                        new_available_windows.append(window)
-
-                available_windows = new_available_windows
-                bonus = 0
-                
-                if best_shift_interval.start_time == last_assigned_end_time:
-                    bonus = self.BONUS_PER_CONSECUTIVE_BREAK
-                if best_shift_interval.end_time.hour < self.EARLY_BREAK_BOUNDARY_HOUR:
-                    bonus += self.EARLY_BREAK_BONUS
-                elif best_shift_interval.start_time.hour >= self.LATE_BREAK_BOUNDARY_HOUR:
-                    bonus += self.LATE_BREAK_BONUS
-                candidate.assignments_to_commit.append((break_, best_shift_interval))
-                minutes = break_.length_in_minutes() + bonus
-                candidate.total_minutes_covered += minutes
-                last_assigned_end_time = best_shift_interval.end_time
-                
-        return candidate
\ No newline at end of file
+    def _shifted_spans_of(self, break_: "BreakAssignment", slot_aligned: bool = False) -> Tuple[Tuple[int, int], ...]:
+        """Shifted spans of the break that are valid in its owner's schedule, in VALID_SHIFT_MOVES order."""
+        spans = self._shifted_spans.get(id(break_))
+        if spans is not None:
+            return spans
+
+        owner_slots = break_.cashier.availability_mask() if slot_aligned else None
+        if owner_slots is not None:
+            # The break may move anywhere within the owner's free slots plus the slots it occupies itself
+            allowed_slots = owner_slots | span_to_slot_mask(break_.start_time, break_.end_time)
+            spans = tuple(
+                (break_.start_time + move, break_.end_time + move)
+                for move in self.VALID_SHIFT_MOVES
+                if break_.start_time + move >= 0
+                and not span_to_slot_mask(break_.start_time + move, break_.end_time + move) & ~allowed_slots
+            )
+        else:
+            spans = tuple(
+                (start_time, end_time)
+                for _, start_time, end_time in break_.cashier.feasible_moves(break_, self.VALID_SHIFT_MOVES)
+            )
+        self._shifted_spans[id(break_)] = spans
+        return spans
+
+    def _reachable_ranges(self, cashier: "Cashier") -> List[Tuple[int, int]]:
+        """
+        Ranges of round pool positions holding every break that could be shifted into one
+        of the cashier's free windows. The round pool is in the pool's start order.
+        """
+        max_move = max(abs(move) for move in self.VALID_SHIFT_MOVES)
+        ranges: List[Tuple[int, int]] = []
+        for window in cashier.availability:
+            low, high = self.all_breaks.overlapping_range(window.start_time - max_move, window.end_time + max_move)
+            if low == high:
+                continue
+            # Windows are sorted, so the ranges only ever need merging with the previous one
+            if ranges and low <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], max(ranges[-1][1], high))
+            else:
+                ranges.append((low, high))
+        return ranges
+
+    def _free_windows(self, cashier: "Cashier", slot_aligned: bool = False) -> FreeWindows:
+        """The cashier's free time as a slot bitmask when possible, otherwise as (start_time, end_time) spans."""
+        if slot_aligned:
+            free_slots = cashier.availability_mask()
+            if free_slots is not None:
+                return free_slots
+        return [(window.start_time, window.end_time) for window in cashier.availability]
+
+    def _cashier_index(self, cashier: "Cashier") -> int:
+        return self._cashier_indexes.setdefault(cashier, len(self._cashier_indexes))
+
+    def _scoring(self) -> CoverageScoring:
+        return CoverageScoring(
+            consecutive_bonus=self.BONUS_PER_CONSECUTIVE_BREAK,
+            early_bonus=self.EARLY_BREAK_BONUS,
+            late_bonus=self.LATE_BREAK_BONUS,
+            early_boundary_hour=self.EARLY_BREAK_BOUNDARY_HOUR,
+            late_boundary_hour=self.LATE_BREAK_BOUNDARY_HOUR,
+            max_move=max(abs(move) for move in self.VALID_SHIFT_MOVES),
+        )
+
+    def _to_candidate(self, cashier: "Cashier", result: CoverageResult, pool_breaks: List["BreakAssignment"]) -> AssignmentCandidate:
+        """Re-binds a plain simulation result to the break objects of the round."""
+        total_minutes_covered, planned, reachable = result
+        return AssignmentCandidate(
+            cashier=cashier,
+            total_minutes_covered=total_minutes_covered,
+            assignments_to_commit=[
+                (pool_breaks[position], TimeInterval(start_time, end_time)) for position, start_time, end_time in planned
+            ],
+            reachable_breaks={id(pool_breaks[position]) for position in reachable},
+        )
+
+    def _breaks_near_move(self, owner: "Cashier", start_time: int, end_time: int) -> Set[int]:
+        """ids of the owner's own breaks whose shifted positions could touch the changed span."""
+        margin = max(abs(move) for move in self.VALID_SHIFT_MOVES)
+        return {
+            id(b) for b in owner.breaks
+            if b.cashier is owner and b.start_time - margin < end_time and b.end_time + margin > start_time
+        }
+
+    def _invalidate_candidates(self,
+                               changed_schedules: Set["Cashier"],
+                               removed_breaks: Set[int],
+                               affected_breaks: Set[int],
+                               pool_reordered: bool) -> None:
+        """
+        Drops the cached simulations whose inputs changed by the last commit.
+        A simulation is only affected if its own schedule changed, if it had planned
+        one of the breaks that left the pool, or if it could reach a break whose
+        possible shifts changed because its owner's schedule changed nearby.
+        Breaks that left the pool without being planned by the simulation never
+        changed its state, so they are safe to ignore.
+        """
+        for break_id in affected_breaks:
+            self._shifted_spans.pop(break_id, None)
+
+        if pool_reordered:
+            # A break went back to the end of the pool, which changes the order of equal start times
+            self.cache_stats.invalidations += len(self._candidate_cache)
+            self._candidate_cache.clear()
+            return
+
+        for cashier, candidate in list(self._candidate_cache.items()):
+            if (cashier in changed_schedules
+                    or not candidate.reachable_breaks.isdisjoint(affected_breaks)
+                    or any(id(b) in removed_breaks for b, _ in candidate.assignments_to_commit)):
+                del self._candidate_cache[cashier]
+                self.cache_stats.invalidations += 1
@@ -1,50 +1,197 @@
-from ..models import Checkout, Cashier, TimeInterval, CheckoutAssignment, BreakAssignment, BaseAssignment
-from datetime import timedelta
-from typing import Dict, List
+from ..collections import ActiveRoster
+from ..models import Checkout, Cashier, TimeInterval, CheckoutAssignment, BreakAssignment, BaseAssignment, SchedulingConfig
+from ..utils import MINUTES_PER_DAY, format_minutes, instrumentation, ticks_near
+from . import decision_trace
+from .decision_trace import DecisionTrace
+import bisect
+import heapq
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Union
+
+
+# Checkouts open during one tick, precomputed once per run
+class OpenCheckouts(NamedTuple):
+    # In the order of CheckoutManager.checkouts
+    checkouts: List[Checkout]
+    members: FrozenSet[Checkout]
+    # Open checkouts of the tobacco ratio pool, in the configured filling order
+    pool_in_filling_order: List[Checkout]
+
 
 class CheckoutManager:
     INTERVAL_MINUTES = 15  # Managing time in 15-minute intervals
-    TOBACCO_RATIO_MAX_TOTAL_CHECKOUTS_KEY = "max_total_checkouts"
-    TOBACCO_RATIO_TOBACCO_CHECKOUTS_KEY = "tobacco_checkouts"
 
-    def __init__(self, cashiers: list[Cashier], checkouts: list[Checkout], checkout_config: dict) -> None:
+    def __init__(self,
+                 cashiers: list[Cashier],
+                 checkouts: list[Checkout],
+                 checkout_config: Union[SchedulingConfig, dict],
+                 interval_minutes: Optional[int] = None,
+                 event_driven: bool = False,
+                 trace: Optional[DecisionTrace] = None,
+                 start_time: Optional[int] = None) -> None:
         self.cashiers = cashiers
         self.checkouts = checkouts
-
-        self.checkout_filling_order = checkout_config.get("checkouts_filling_order")
+        # Length of one tick, INTERVAL_MINUTES unless a finer (or coarser) resolution is requested
+        self.interval_minutes = self.INTERVAL_MINUTES if interval_minutes is None else interval_minutes
+        if not isinstance(self.interval_minutes, int) or self.interval_minutes <= 0:
+            raise ValueError("interval_minutes must be a positive whole number of minutes")
+        # Event-driven mode only recomputes at ticks where some shift, break or checkout starts or ends
+        self.event_driven = event_driven
+        # Opt-in: records the candidate priorities, tobacco swaps and continuity choices of every tick
+        self.trace = trace
+
+        # A raw config dictionary (as left by DataManager.load_config) is compiled here
+        if not isinstance(checkout_config, SchedulingConfig):
+            checkout_config = SchedulingConfig.compile(checkout_config, checkouts)
+        self.config = checkout_config
+
+        self.checkout_filling_order = checkout_config.checkouts_filling_order
         # All checkouts that are calculated in the tobacco ratio (e.g., all open checkouts or only those in a specific pool)
-        self.tobacco_ratio_pool = checkout_config.get("tobacco_ratio_pool")
-        self.tobacco_checkout_ratios = checkout_config.get("tobacco_checkout_ratios")
+        self.tobacco_ratio_pool = checkout_config.ratio_pool
+        # The checkouts of the pool, looked up per tick. Kept here rather than in the checkouts' flags,
+        # since managers with other configs can share the same checkouts
+        self.ratio_pool_checkouts: FrozenSet[Checkout] = frozenset(
+            checkout for checkout in checkouts if checkout.identifier in self.tobacco_ratio_pool
+        )
+        self.tobacco_checkout_ratios = checkout_config.tobacco_checkout_ratios
+        # {tick start_time: OpenCheckouts}, built at the start of assign_checkouts_to_cashiers
+        self._open_checkouts_index: Dict[int, OpenCheckouts] = {}
         # stores {Checkout: CheckoutAssignment or BreakAssignment} assignments for the current interval
         self.latest_assignments = {}
+        # (tick start_time, checkout) of every checkout that got a new cashier, in the order they got one.
+        # A checkout keeps its place in latest_assignments for as long as it stays staffed, so this
+        # is also the order of latest_assignments, which a re-plan from the middle of the day needs.
+        self.entry_order: List[tuple[int, Checkout]] = []
 
-        first_start_dt = checkout_config.get("simulation_start_time")
-        last_interval_end_dt = checkout_config.get("simulation_end_time")
+        first_start_dt = checkout_config.simulation_start_time
+        last_interval_end_dt = checkout_config.simulation_end_time
 
         # Handle next-day wrap (e.g., if end time is 00:00 and start time is 08:00)
         if last_interval_end_dt < first_start_dt:
-            last_interval_end_dt += timedelta(days=1)
+            last_interval_end_dt += MINUTES_PER_DAY
         
         self.simulation_end = last_interval_end_dt
         
-        # Start the first interval
-        first_end_dt = first_start_dt + timedelta(minutes=self.INTERVAL_MINUTES)
+        # Start the first interval, later than the simulation start when only the rest of the day is planned
+        if start_time is not None:
+            first_start_dt = start_time
+        first_end_dt = first_start_dt + self.interval_minutes
         self.current_interval = TimeInterval(first_start_dt, first_end_dt)
 
 
+    @instrumentation.timed("assign_checkouts_to_cashiers")
     def assign_checkouts_to_cashiers(self) -> None:
+        self._build_open_checkouts_index()
+        change_ticks = self._build_change_ticks() if self.event_driven else []
+        roster = ActiveRoster(self.cashiers, self.current_interval.start_time, self.interval_minutes)
         while self.current_interval.end_time <= self.simulation_end:
-            # available_cashiers are those that are tauottajas or available to work in a checkout during the current interval
-            available_cashiers = [cashier for cashier in self.cashiers if cashier.is_assigned_to_checkout_or_available_during(self.current_interval)]
-            open_checkouts_amount = len(available_cashiers)
-            checkouts_to_fill = self._determine_checkouts_to_fill(open_checkouts_amount)
+            with instrumentation.phase("assign_checkouts_to_cashiers.tick"):
+                previous_assignments = self.latest_assignments
+                # available_cashiers are those that are tauottajas or available to work in a checkout during the current interval
+                available_cashiers = roster.available_during(self.current_interval)
+                open_checkouts_amount = len(available_cashiers)
+                checkouts_to_fill = self._determine_checkouts_to_fill(open_checkouts_amount)
 
-            self._assign_cashiers_to_checkouts(available_cashiers, checkouts_to_fill)
-            self._advance_interval()
+                self._assign_cashiers_to_checkouts(available_cashiers, checkouts_to_fill)
+                self._advance_interval()
+
+                if self.event_driven and self._assignments_kept(previous_assignments):
+                    self._skip_quiet_ticks(change_ticks)
 
     def _advance_interval(self) -> None:
-        """Advance the current interval by INTERVAL_MINUTES."""  
-        self.current_interval.move_by_minutes(self.INTERVAL_MINUTES)
+        """Advance the current interval by one tick."""  
+        self.current_interval.move_by_minutes(self.interval_minutes)
+
+    def _build_change_ticks(self) -> list[int]:
+        """
+        Sorted start times of the ticks whose inputs can differ from the previous tick.
+        A tick's inputs only depend on how it relates to the shift, break and checkout
+        boundaries, and that relation only changes for ticks closer than one tick to a boundary.
+        """
+        boundaries = set()
+        for cashier in self.cashiers:
+            boundaries.add(cashier.schedule.boundary_interval.start_time)
+            boundaries.add(cashier.schedule.boundary_interval.end_time)
+            for break_assignment in cashier.breaks:
+                boundaries.add(break_assignment.start_time)
+                boundaries.add(break_assignment.end_time)
+        for checkout in self.checkouts:
+            boundaries.add(checkout.schedule.boundary_interval.start_time)
+            boundaries.add(checkout.schedule.boundary_interval.end_time)
+
+        first_tick_start = self.current_interval.start_time
+        change_ticks = set()
+        for boundary in boundaries:
+            change_ticks.update(ticks_near(boundary, first_tick_start, self.interval_minutes))
+        return sorted(change_ticks)
+
+    def _assignments_kept(self, previous_assignments: Dict[Checkout, BaseAssignment]) -> bool:
+        """Whether the last tick kept every assignment as it was, in the same order."""
+        if len(previous_assignments) != len(self.latest_assignments):
+            return False
+        return all(
+            previous_checkout is checkout and previous_assignment is assignment
+            for (previous_checkout, previous_assignment), (checkout, assignment)
+            in zip(previous_assignments.items(), self.latest_assignments.items())
+        )
+
+    def _skip_quiet_ticks(self, change_ticks: list[int]) -> None:
+        """
+        After a tick that kept every assignment, every tick up to the next change tick
+        would keep them too. Extends the checkout assignments over those ticks in one step.
+        """
+        start_time = self.current_interval.start_time
+        # Ticks left in the simulation, then only those before the next change tick
+        quiet_ticks = max(0, (self.simulation_end - start_time) // self.interval_minutes)
+        next_change = bisect.bisect_left(change_ticks, start_time)
+        if next_change < len(change_ticks):
+            quiet_ticks = min(quiet_ticks, (change_ticks[next_change] - start_time) // self.interval_minutes)
+        if quiet_ticks == 0:
+            return
+
+        minutes = quiet_ticks * self.interval_minutes
+        for assignment in self.latest_assignments.values():
+            if isinstance(assignment, CheckoutAssignment):
+                assignment.extend(minutes)
+        self.current_interval.move_by_minutes(minutes)
+
+    def _build_open_checkouts_index(self) -> None:
+        """
+        Buckets the checkouts by the ticks they are open for. A checkout is open for a
+        contiguous run of ticks, so its first and last tick follow from its boundary directly.
+        """
+        first_tick_start = self.current_interval.start_time
+        tick_count = max(0, (self.simulation_end - first_tick_start) // self.interval_minutes)
+        open_by_tick: List[List[Checkout]] = [[] for _ in range(tick_count)]
+
+        for checkout in self.checkouts:
+            boundary = checkout.schedule.boundary_interval
+            # First tick starting at or after the opening time, last tick ending at or before the closing time
+            first_tick = max(0, -(-(boundary.start_time - first_tick_start) // self.interval_minutes))
+            end_tick = min(tick_count, (boundary.end_time - first_tick_start) // self.interval_minutes)
+            for tick in range(first_tick, end_tick):
+                open_by_tick[tick].append(checkout)
+
+        self._open_checkouts_index = {
+            first_tick_start + tick * self.interval_minutes: self._describe_open_checkouts(open_checkouts)
+            for tick, open_checkouts in enumerate(open_by_tick)
+        }
+
+    def _describe_open_checkouts(self, open_checkouts: List[Checkout]) -> OpenCheckouts:
+        filling_ranks = self.config.filling_ranks
+        # identifier -> first open pool checkout with that identifier
+        pool_by_identifier: Dict[str, Checkout] = {}
+        for checkout in open_checkouts:
+            if checkout in self.ratio_pool_checkouts and checkout.identifier in filling_ranks:
+                pool_by_identifier.setdefault(checkout.identifier, checkout)
+        pool_checkouts = sorted(pool_by_identifier.values(), key=lambda c: filling_ranks[c.identifier])
+        return OpenCheckouts(open_checkouts, frozenset(open_checkouts), pool_checkouts)
+
+    def _open_checkouts_during(self, interval: TimeInterval) -> OpenCheckouts:
+        """Open checkouts for the interval, from the index when it is one of the run's ticks."""
+        open_checkouts = self._open_checkouts_index.get(interval.start_time)
+        if open_checkouts is None or interval.length_in_minutes() != self.interval_minutes:
+            open_checkouts = self._describe_open_checkouts([c for c in self.checkouts if c.is_within_boundary(interval)])
+        return open_checkouts
 
     def _determine_checkouts_to_fill(self, checkouts_needed: int) -> list[Checkout]:
         """
@@ -54,18 +201,13 @@ class CheckoutManager:
         
         # 1. SETUP & FILTERING
 
-        open_checkouts = [c for c in self.checkouts if c.is_within_boundary(self.current_interval)]
+        open_checkouts_now = self._open_checkouts_during(self.current_interval)
+        open_checkouts = open_checkouts_now.checkouts
         if not open_checkouts or checkouts_needed <= 0:
             return []
 
         checkouts_needed = min(checkouts_needed, len(open_checkouts))
 
-        # ratio_pool_identifiers is the set of checkout identifiers that are included in the tobacco ratio calculations
-        # Could maybe add it as a property to the Checkout class instead of doing this string-based matching here, but for now it works and keeps the Checkout class simpler
-        ratio_pool_identifiers = {str(identifier) for identifier in self.tobacco_ratio_pool}
-        # check which open checkouts are in the tobacco ratio pool (e.g., all open checkouts or only those in a specific pool defined in config), this determines which checkouts are counted towards the tobacco ratio and which are not
-        ratio_pool_checkouts = [c for c in open_checkouts if c.identifier in ratio_pool_identifiers]
-
         # Candidates is a list of tuples (priority, order_index, Checkout) to facilitate sorting.
         # Priority levels (lower = higher priority):
         #   0 - Mandatory checkouts (must always be staffed)
@@ -93,7 +235,7 @@ class CheckoutManager:
 
         # B. Active break coverage takes precedence after mandatory lanes
         for checkout, assignment in self.latest_assignments.items():
-            if checkout in open_checkouts and checkout not in added:
+            if checkout in open_checkouts_now.members and checkout not in added:
                 if isinstance(assignment, BreakAssignment):
                     add_candidate(checkout, 1)
                 elif isinstance(assignment, CheckoutAssignment):
@@ -105,14 +247,12 @@ class CheckoutManager:
                         add_candidate(checkout, 2)
 
         # C. Add remaining checkouts respecting the configured filling order
-        for checkout_identifier in self.checkout_filling_order:
-            checkout = next((c for c in ratio_pool_checkouts if c.identifier == str(checkout_identifier)), None)
-            if checkout:
-                add_candidate(checkout, 3 if checkout.is_tobacco_checkout else 4)
+        for checkout in open_checkouts_now.pool_in_filling_order:
+            add_candidate(checkout, 3 if checkout.is_tobacco_checkout else 4)
 
         # D. Finally add any other open checkouts (e.g. self service lanes already added if mandatory)
         for checkout in open_checkouts:
-            if checkout.identifier not in ratio_pool_identifiers:
+            if checkout not in self.ratio_pool_checkouts:
                 add_candidate(checkout, 5 if not checkout.is_mandatory_open else 0)
 
         if not candidates:
@@ -122,116 +262,103 @@ class CheckoutManager:
         required_checkouts = [chk for priority, _, chk in candidates if priority <= 1]
         if len(required_checkouts) > checkouts_needed:
             raise ValueError(
-                f"Not enough cashiers to cover mandatory or break coverage checkouts at {self.current_interval.start_time.strftime('%H:%M')}."
+                f"Not enough cashiers to cover mandatory or break coverage checkouts at {format_minutes(self.current_interval.start_time)}."
             )
 
         candidates.sort(key=lambda item: (item[0], item[1]))
         selected = candidates[:checkouts_needed]
+        if self.trace is not None:
+            self.trace.record(
+                decision_trace.CANDIDATES, self.current_interval.start_time, checkouts_needed, tuple(candidates), len(selected)
+            )
         selected_set = {chk for _, _, chk in selected}
 
         for checkout in required_checkouts:
             if checkout not in selected_set:
                 raise ValueError(
-                    f"Not enough cashiers to cover mandatory or break coverage checkouts at {self.current_interval.start_time.strftime('%H:%M')}."
+                    f"Not enough cashiers to cover mandatory or break coverage checkouts at {format_minutes(self.current_interval.start_time)}."
                 )
 
-        # Could be better to have a method in data_manager ?
-        def required_tobacco(total_pool: int) -> int:
-            if total_pool <= 0 or not self.tobacco_checkout_ratios:
-                return 0
-            sorted_ratios = sorted(
-                self.tobacco_checkout_ratios,
-                key=lambda cfg: cfg[self.TOBACCO_RATIO_MAX_TOTAL_CHECKOUTS_KEY]
-            )
-            for ratio in sorted_ratios:
-                if total_pool <= ratio[self.TOBACCO_RATIO_MAX_TOTAL_CHECKOUTS_KEY]:
-                    return ratio[self.TOBACCO_RATIO_TOBACCO_CHECKOUTS_KEY]
-            return sorted_ratios[-1][self.TOBACCO_RATIO_TOBACCO_CHECKOUTS_KEY]
-
-        # Utility to calculate current pool/tobacco counts returned as a tuple (total_pool, tobacco_count) based on the current selection, used for validating ratio and guiding adjustments
-        def ratio_snapshot(selection: list[tuple[int, int, Checkout]]) -> tuple[int, int]:
-            pool_checkouts = [chk for _, _, chk in selection if chk.identifier in ratio_pool_identifiers]
-            total_pool = len(pool_checkouts)
-            tobacco_count = sum(1 for chk in pool_checkouts if chk.is_tobacco_checkout)
-            return total_pool, tobacco_count
-
-        # Attempt to satisfy tobacco ratio by swapping in tobacco lanes when possible
-        max_iterations = len(candidates) * 2
-        iterations = 0
-        while True:
-            iterations += 1
-            if iterations > max_iterations:
-                break
-
-            total_pool, tobacco_count = ratio_snapshot(selected)
-            if total_pool == 0:
-                break
-
-            required_tobacco_count = required_tobacco(total_pool)
-            if tobacco_count >= required_tobacco_count:
-                break
-
-            # Identify potential replacements by finding available tobacco checkouts not currently selected and removable non-tobacco checkouts currently selected (while respecting mandatory and break coverage priorities)
-            available_tobacco = [item for item in candidates if item[2].is_tobacco_checkout and item[2] not in selected_set]
-            removable = [item for item in selected if item[0] > 1 and not item[2].is_tobacco_checkout]
-
+        # Tobacco ratio balancing. Each swap brings in the best unselected tobacco lane and drops the
+        # least important removable (not mandatory or break coverage) non-tobacco lane. Swaps never
+        # create new tobacco or removable lanes, so both queues are built once and only popped.
+        # Current pool/tobacco counts of the selection are kept up to date with every swap.
+        total_pool = sum(1 for _, _, chk in selected if chk in self.ratio_pool_checkouts)
+        tobacco_count = sum(1 for _, _, chk in selected if chk in self.ratio_pool_checkouts and chk.is_tobacco_checkout)
+        required_tobacco_count = self.config.required_tobacco(total_pool)
+        if total_pool == 0 or tobacco_count >= required_tobacco_count:
+            return [checkout for _, _, checkout in selected]
+
+        # Lowest (priority, order) first; candidates are already sorted, which is a valid heap
+        available_tobacco = [item for item in candidates[checkouts_needed:] if item[2].is_tobacco_checkout]
+        # Highest (priority, order) first
+        removable = [(-item[0], -item[1], item) for item in selected if item[0] > 1 and not item[2].is_tobacco_checkout]
+        heapq.heapify(removable)
+
+        swapped_out: set[Checkout] = set()
+        swapped_in: list[tuple[int, int, Checkout]] = []
+        while total_pool > 0 and tobacco_count < required_tobacco_count:
             if not available_tobacco or not removable:
                 raise ValueError(
-                    f"Cannot satisfy tobacco checkout ratio with available cashiers at {self.current_interval.start_time.strftime('%H:%M')}."
+                    f"Cannot satisfy tobacco checkout ratio with available cashiers at {format_minutes(self.current_interval.start_time)}."
                 )
-
-            # Sort available tobacco by priority (lowest first) and removable by priority (highest first) to ensure we swap in the most impactful tobacco lane and remove the least critical non-tobacco lane
-            available_tobacco.sort(key=lambda item: (item[0], item[1]))
-            removable.sort(key=lambda item: (-item[0], -item[1]))
-
-            replacement = available_tobacco[0]
-            to_remove = removable[0]
-
-            selected.remove(to_remove)
-            selected.append(replacement)
-            selected_set.remove(to_remove[2])
-            selected_set.add(replacement[2])
-            selected.sort(key=lambda item: (item[0], item[1]))
-
-        # Final validation after ratio adjustments
-        total_pool, tobacco_count = ratio_snapshot(selected)
-        if total_pool > 0:
-            required_tobacco_count = required_tobacco(total_pool)
-            if tobacco_count < required_tobacco_count:
-                raise ValueError(
-                    f"Cannot satisfy tobacco checkout ratio with available cashiers at {self.current_interval.start_time.strftime('%H:%M')}."
+            replacement = heapq.heappop(available_tobacco)
+            to_remove = heapq.heappop(removable)[2]
+            swapped_in.append(replacement)
+            swapped_out.add(to_remove[2])
+
+            if to_remove[2] in self.ratio_pool_checkouts:
+                total_pool -= 1
+            if replacement[2] in self.ratio_pool_checkouts:
+                total_pool += 1
+                tobacco_count += 1
+            required_tobacco_count = self.config.required_tobacco(total_pool)
+            if self.trace is not None:
+                self.trace.record(
+                    decision_trace.TOBACCO_SWAP, self.current_interval.start_time, replacement[2], to_remove[2],
+                    tobacco_count, required_tobacco_count,
                 )
 
+        selected = [item for item in selected if item[2] not in swapped_out] + swapped_in
+        selected.sort(key=lambda item: (item[0], item[1]))
+
         return [checkout for _, _, checkout in selected]
 
     def _assign_cashiers_to_checkouts(self, 
                                       available_cashiers: list[Cashier], 
                                       checkouts_to_fill: list[Checkout]) -> None:
         new_latest_assignments: Dict[Checkout, BaseAssignment] = {}
+        # Insertion ordered working sets: O(1) membership and removal, iteration in the original order
+        unassigned_cashiers: Dict[Cashier, None] = dict.fromkeys(available_cashiers)
+        remaining_checkouts: Dict[Checkout, None] = dict.fromkeys(checkouts_to_fill)
+        # 0. cashiers settled on a checkout before continuity is considered (only in a re-plan)
+        reserved = self._reserve_cashiers(unassigned_cashiers, remaining_checkouts)
         # 1. maximize continuity by reassigning previous cashiers where possible
         for checkout, assignment in self.latest_assignments.items():
-            if checkout in checkouts_to_fill:
+            if checkout in remaining_checkouts and checkout not in reserved:
                 originally_assigned_cashier = assignment.cashier
                 if isinstance(assignment, CheckoutAssignment):
-                    if originally_assigned_cashier in available_cashiers and originally_assigned_cashier.is_available_during(self.current_interval):
-                        assignment.extend(self.INTERVAL_MINUTES)
+                    if originally_assigned_cashier in unassigned_cashiers and originally_assigned_cashier.is_available_during(self.current_interval):
+                        assignment.extend(self.interval_minutes)
                         new_latest_assignments[checkout] = assignment
-                        checkouts_to_fill.remove(checkout)
-                        available_cashiers.remove(originally_assigned_cashier)
+                        del remaining_checkouts[checkout]
+                        del unassigned_cashiers[originally_assigned_cashier]
+                        self._trace_continuity(decision_trace.CONTINUITY_EXTENDED, checkout, originally_assigned_cashier)
                         continue
                     break_assignment, is_on_break = originally_assigned_cashier.is_on_break_during(self.current_interval)
                     if is_on_break and break_assignment.tauottaja is not None:
                         break_assignment.checkout = checkout
                         new_latest_assignments[checkout] = break_assignment
                         checkout.assign_cashier(break_assignment)
-                        checkouts_to_fill.remove(checkout)
-                        available_cashiers.remove(break_assignment.tauottaja)
+                        del remaining_checkouts[checkout]
+                        self._take_tauottaja(unassigned_cashiers, break_assignment.tauottaja)
+                        self._trace_continuity(decision_trace.CONTINUITY_RELIEVED, checkout, break_assignment.tauottaja)
                         continue
 
                 elif isinstance(assignment, BreakAssignment):
                     tauottaja = assignment.tauottaja
                     if assignment.end_time <= self.current_interval.start_time:
-                        if originally_assigned_cashier in available_cashiers and originally_assigned_cashier.is_available_during(self.current_interval):
+                        if originally_assigned_cashier in unassigned_cashiers and originally_assigned_cashier.is_available_during(self.current_interval):
                             new_assignment = CheckoutAssignment(
                                 start_time=self.current_interval.start_time, 
                                 end_time=self.current_interval.end_time,
@@ -241,28 +368,59 @@ class CheckoutManager:
                             new_latest_assignments[checkout] = new_assignment   
                             checkout.assign_cashier(new_assignment)
                             assignment.cashier.add_interval(new_assignment)
-                            available_cashiers.remove(originally_assigned_cashier)
-                            checkouts_to_fill.remove(checkout)
+                            del unassigned_cashiers[originally_assigned_cashier]
+                            del remaining_checkouts[checkout]
+                            self._trace_continuity(decision_trace.CONTINUITY_RETURNED, checkout, originally_assigned_cashier)
                     else:
-                        checkouts_to_fill.remove(checkout)
-                        available_cashiers.remove(tauottaja)
+                        del remaining_checkouts[checkout]
+                        self._take_tauottaja(unassigned_cashiers, tauottaja)
                         new_latest_assignments[checkout] = assignment
+                        self._trace_continuity(decision_trace.CONTINUITY_COVERING, checkout, tauottaja)
     
-        # 2. New assignments for remaining checkouts 
-        for checkout in checkouts_to_fill:
-            for cashier in list(available_cashiers):
-                if not cashier.is_available_during(self.current_interval):
-                    continue
-                new_assignment = CheckoutAssignment(
-                    start_time=self.current_interval.start_time, 
-                    end_time=self.current_interval.end_time,
-                    cashier=cashier,
-                    checkout=checkout
-                )
-                new_latest_assignments[checkout] = new_assignment
-                checkout.assign_cashier(new_assignment)
-                cashier.add_interval(new_assignment)
-                available_cashiers.remove(cashier)
-                break
+        # 2. New assignments for remaining checkouts. A cashier that cannot take this interval
+        # cannot take it for a later checkout either, so one pass over the cashiers is enough.
+        free_cashiers = (cashier for cashier in unassigned_cashiers if cashier.is_available_during(self.current_interval))
+        for checkout in remaining_checkouts:
+            cashier = reserved[checkout] if checkout in reserved else next(free_cashiers, None)
+            if cashier is None:
+                continue
+            self._start_assignment(checkout, cashier, new_latest_assignments)
 
         self.latest_assignments = new_latest_assignments
+
+    def _reserve_cashiers(self,
+                          unassigned_cashiers: Dict[Cashier, None],
+                          remaining_checkouts: Dict[Checkout, None]) -> Dict[Checkout, Cashier]:
+        """
+        {checkout: cashier} of remaining checkouts that get a new assignment of that cashier this
+        interval whatever the continuity step would do. The implementation removes the cashiers
+        from unassigned_cashiers. None in a normal run.
+        """
+        return {}
+
+    def _start_assignment(self,
+                          checkout: Checkout,
+                          cashier: Cashier,
+                          new_latest_assignments: Dict[Checkout, BaseAssignment]) -> None:
+        new_assignment = CheckoutAssignment(
+            start_time=self.current_interval.start_time, 
+            end_time=self.current_interval.end_time,
+            cashier=cashier,
+            checkout=checkout
+        )
+        new_latest_assignments[checkout] = new_assignment
+        checkout.assign_cashier(new_assignment)
+        cashier.add_interval(new_assignment)
+        self.entry_order.append((self.current_interval.start_time, checkout))
+
+    def _trace_continuity(self, choice: str, checkout: Checkout, cashier: Optional[Cashier]) -> None:
+        if self.trace is not None:
+            self.trace.record(decision_trace.CONTINUITY, self.current_interval.start_time, choice, checkout, cashier)
+
+    def _take_tauottaja(self, unassigned_cashiers: Dict[Cashier, None], tauottaja: Cashier) -> None:
+        """Removes the tauottaja covering a checkout from the cashiers still to be assigned."""
+        if tauottaja not in unassigned_cashiers:
+            raise ValueError(
+                f"Tauottaja {tauottaja.name} is not available to cover a break at {format_minutes(self.current_interval.start_time)}."
+            )
+        del unassigned_cashiers[tauottaja]
@@ -1,11 +1,12 @@
 import json
-from datetime import datetime, timedelta, time
+from datetime import datetime, time
 from typing import TYPE_CHECKING, List, Dict, Any
 from pathlib import Path
 
 from ..models import TimeInterval
-from ..models import Cashier, Checkout
+from ..models import Cashier, Checkout, SchedulingConfig
 from ..collections import CashierScheduleCollection, CheckoutScheduleCollection
+from ..utils import MINUTES_PER_DAY, datetime_to_minutes, instrumentation
 
 if TYPE_CHECKING:
     from ..models import BreakAssignment
@@ -20,6 +21,7 @@ class DataManager:
         self.cashiers: List[Cashier] = []
         self.checkouts: List[Checkout] = []
         self.config: Dict[str, Any] = {}
+        self.compiled_config: SchedulingConfig | None = None
 
     # --- Properties ---
     @property
@@ -36,12 +38,14 @@ class DataManager:
             all_availabilities.extend(cashier.all_availabilities)
         return all_availabilities
     
+    @instrumentation.timed("load_data")
     def load_data(self, file_name: str) -> None:
         try:
             with open(self.ROOT_FOLDER / file_name, "r") as json_file:
                 # self.cashiers temporarily holds raw JSON list
                 self.cashiers = json.load(json_file)
-                self._validate_cashiers_data()
+                with instrumentation.phase("load_data.validate"):
+                    self._validate_cashiers_data()
                 self._transform_cashiers_shift_intervals_to_TimeInterval_objects()
                 self._transform_cashiers_to_cashier_objects()
         except FileNotFoundError:
@@ -51,13 +55,16 @@ class DataManager:
         except Exception as e:
             raise Exception(f"Error loading cashier data: {e}")
 
+    @instrumentation.timed("load_config")
     def load_config(self, file_name: str) -> None:
         try:
             with open(self.ROOT_FOLDER / file_name, "r") as json_file:
                 self.config = json.load(json_file)
-                self._validate_config_data()
-                self._validate_tobacco_ratio_pool() 
+                with instrumentation.phase("load_config.validate"):
+                    self._validate_config_data()
+                    self._validate_tobacco_ratio_pool()
                 self._transform_checkouts_to_checkout_objects()
+                self.compiled_config = SchedulingConfig.compile(self.config, self.checkouts)
                 
         except FileNotFoundError:
             raise FileNotFoundError(f"{file_name} not found")
@@ -77,6 +84,10 @@ class DataManager:
         except ValueError:
             return False
         
+    def _parse_time_to_minutes(self, time_str: str) -> int:
+        """Parses a 'HH:MM' string into whole minutes from the day origin."""
+        return datetime_to_minutes(datetime.strptime(time_str, "%H:%M"))
+        
     def _check_required_keys(self, dictionary: dict, required_keys: list) -> None:
         for key in required_keys:
             if key not in dictionary:
@@ -96,10 +107,10 @@ class DataManager:
 
     def _transform_cashiers_shift_intervals_to_TimeInterval_objects(self):
         for cashier in self.cashiers:
-            cashier_shift_start = datetime.strptime(cashier["shift_start"], "%H:%M")
-            cashier_shift_end = datetime.strptime(cashier["shift_end"], "%H:%M")
+            cashier_shift_start = self._parse_time_to_minutes(cashier["shift_start"])
+            cashier_shift_end = self._parse_time_to_minutes(cashier["shift_end"])
             if cashier_shift_start >= cashier_shift_end:
-                cashier_shift_end = cashier_shift_end + timedelta(days=1)
+                cashier_shift_end = cashier_shift_end + MINUTES_PER_DAY
             
             cashier["shift_interval"] = TimeInterval(cashier_shift_start, cashier_shift_end)
             del cashier["shift_start"]
@@ -195,15 +206,16 @@ class DataManager:
     def _transform_checkouts_to_checkout_objects(self):
         """
         Processes time groups, creates all Checkout objects, and calculates 
-        the final simulation boundaries as datetime.time objects.
+        the final simulation boundaries as minutes from the day origin.
         """
         
         checkout_objects: List[Checkout] = []
         tobacco_checkouts_set = set(self.config["tobacco_checkouts"])
+        ratio_pool_set = set(self.config["tobacco_ratio_pool"])
         
         # Lists to track all boundary times for simulation min/max
-        all_opening_times: List[datetime] = []
-        all_closing_times: List[datetime] = []
+        all_opening_times: List[int] = []
+        all_closing_times: List[int] = []
 
         for group in self.config["checkout_time_groups"]:
             
@@ -211,13 +223,13 @@ class DataManager:
             closing_time_str = group["closing_time"]
             is_mandatory_open = group.get("mandatory_open", False)
 
-            # 1. Convert time strings to datetime objects for interval calculation
-            start_dt_for_interval = datetime.strptime(start_time_str, "%H:%M")
-            end_dt_for_interval = datetime.strptime(closing_time_str, "%H:%M")
+            # 1. Convert time strings to minutes for interval calculation
+            start_dt_for_interval = self._parse_time_to_minutes(start_time_str)
+            end_dt_for_interval = self._parse_time_to_minutes(closing_time_str)
             
             # 2. Handle closing time that is on the next day (e.g., 00:00)
             if start_dt_for_interval >= end_dt_for_interval:
-                end_dt_for_interval += timedelta(days=1)
+                end_dt_for_interval += MINUTES_PER_DAY
 
             # 3. Store time objects and simulation boundaries
             opening_time_obj = start_dt_for_interval
@@ -241,7 +253,8 @@ class DataManager:
                     identifier,
                     schedule,
                     is_tobacco_authorized,
-                    is_mandatory_open
+                    is_mandatory_open,
+                    str(identifier) in ratio_pool_set
                 )
                 schedule.checkout = checkout_obj
                 checkout_objects.append(checkout_obj)
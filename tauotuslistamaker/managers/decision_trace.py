@@ -0,0 +1,117 @@
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from ..utils import format_minutes
+
+if TYPE_CHECKING:
+    from ..models import Cashier
+
+# Record kinds. Every record is a plain tuple (kind, *fields) holding the objects and numbers
+# as they were at the decision; nothing is formatted until the trace is dumped.
+#   (ROUND, round_number, reliever, total_minutes, breaks_covered, breaks_left)
+ROUND = "round"
+#   (UNASSIGNED, round_number, breaks_left)
+UNASSIGNED = "unassigned"
+#   (CANDIDATES, tick_start, checkouts_needed, ((priority, order_index, checkout), ...) sorted, selected_count)
+CANDIDATES = "candidates"
+#   (TOBACCO_SWAP, tick_start, checkout_in, checkout_out, tobacco_count, required_tobacco_count)
+TOBACCO_SWAP = "tobacco_swap"
+#   (CONTINUITY, tick_start, choice, checkout, cashier), choice is one of the CONTINUITY_* below
+CONTINUITY = "continuity"
+CONTINUITY_EXTENDED = "extended"     # the cashier stays at the checkout
+CONTINUITY_RELIEVED = "relieved"     # the cashier went on break and the tauottaja took over
+CONTINUITY_RETURNED = "returned"     # the cashier came back from break
+CONTINUITY_COVERING = "covering"     # the tauottaja keeps covering the break
+
+DEFAULT_CAPACITY = 10_000
+
+TraceRecord = Tuple
+
+
+def _name(cashier: Optional["Cashier"]) -> str:
+    return cashier.name if cashier is not None else "None"
+
+
+def _format_round(round_number, reliever, total_minutes, breaks_covered, breaks_left) -> str:
+    return (f"round {round_number}: {_name(reliever)} covers {breaks_covered} break(s), "
+            f"score {total_minutes:g}, {breaks_left} left")
+
+
+def _format_unassigned(round_number, breaks_left) -> str:
+    return f"round {round_number}: no reliever found, {breaks_left} break(s) left unassigned"
+
+
+def _format_candidates(tick_start, checkouts_needed, candidates, selected_count) -> str:
+    ranked = ", ".join(f"{checkout.identifier}:{priority}" for priority, _, checkout in candidates)
+    return (f"{format_minutes(tick_start)} candidates (checkout:priority) {ranked}; "
+            f"{checkouts_needed} needed, first {selected_count} selected")
+
+
+def _format_tobacco_swap(tick_start, checkout_in, checkout_out, tobacco_count, required_tobacco_count) -> str:
+    return (f"{format_minutes(tick_start)} tobacco swap: {checkout_in.identifier} in, {checkout_out.identifier} out "
+            f"({tobacco_count}/{required_tobacco_count} tobacco)")
+
+
+def _format_continuity(tick_start, choice, checkout, cashier) -> str:
+    return f"{format_minutes(tick_start)} checkout {checkout.identifier} {choice}: {_name(cashier)}"
+
+
+_FORMATTERS: Dict[str, Callable[..., str]] = {
+    ROUND: _format_round,
+    UNASSIGNED: _format_unassigned,
+    CANDIDATES: _format_candidates,
+    TOBACCO_SWAP: _format_tobacco_swap,
+    CONTINUITY: _format_continuity,
+}
+
+
+class DecisionTrace:
+    """
+    Bounded trace of the scheduling decisions, for finding out afterwards why a schedule
+    looks the way it does. Opt in by passing one to BreakManager and CheckoutManager
+    (they can share one). Recording appends one tuple to a ring buffer, which is O(1)
+    and drops the oldest record once capacity records are stored.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.records: deque[TraceRecord] = deque(maxlen=capacity)
+        # Number of records ever made, including the ones already dropped
+        self.recorded = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.records.maxlen
+
+    @property
+    def dropped(self) -> int:
+        return self.recorded - len(self.records)
+
+    def record(self, *record) -> None:
+        """Stores a (kind, *fields) record, see the kinds at the top of this module."""
+        self.records.append(record)
+        self.recorded += 1
+
+    def clear(self) -> None:
+        self.records.clear()
+        self.recorded = 0
+
+    def of_kind(self, kind: str) -> List[TraceRecord]:
+        return [record for record in self.records if record[0] == kind]
+
+    @staticmethod
+    def format_record(record: TraceRecord) -> str:
+        kind, *fields = record
+        return _FORMATTERS[kind](*fields)
+
+    def lines(self) -> Iterator[str]:
+        """The stored records formatted one per line, oldest first."""
+        if self.dropped:
+            yield f"... {self.dropped} older record(s) dropped"
+        for record in self.records:
+            yield self.format_record(record)
+
+    def dump(self, file: TextIO) -> None:
+        for line in self.lines():
+            file.write(line + "\n")
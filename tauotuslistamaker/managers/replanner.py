@@ -0,0 +1,427 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Sequence, Set, Tuple, Union
+
+from ..collections import CashierScheduleCollection
+from ..models import BreakAssignment, Cashier, CheckoutAssignment, TimeInterval
+from ..utils import instrumentation
+from .break_manager import BreakManager
+from .checkout_manager import CheckoutManager
+
+if TYPE_CHECKING:
+    from ..models import Checkout
+
+
+# Roster changes, times are whole minutes from the day origin like everywhere else
+class CashierAbsent(NamedTuple):
+    """The cashier leaves (or never comes in); their shift ends at the freeze time."""
+    name: str
+
+
+class ShiftChanged(NamedTuple):
+    """The cashier's shift is extended or shortened. The start can only change if the shift has not started."""
+    name: str
+    shift_start: int
+    shift_end: int
+
+
+class CashierAdded(NamedTuple):
+    """A cashier joins the roster; their shift cannot start before the freeze time."""
+    name: str
+    shift_start: int
+    shift_end: int
+
+
+RosterDelta = Union[CashierAbsent, ShiftChanged, CashierAdded]
+
+
+class _ReplanBreakManager(BreakManager):
+    """
+    BreakManager for the breaks a roster change left uncovered, which must stay after the freeze
+    time and must not leave too few cashiers for the mandatory checkouts and the covered breaks.
+    """
+    # A re-plan usually has only a break or two to place, so any reliever is better than none
+    REQUIRED_MIN_COVERAGE = 0
+
+    def __init__(self,
+                 *args,
+                 not_before: int,
+                 mandatory_checkouts: Sequence["Checkout"],
+                 tick_minutes: int,
+                 **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.not_before = not_before
+        self.mandatory_checkouts = mandatory_checkouts
+        self.tick_minutes = tick_minutes
+
+    def _shifted_spans_of(self, break_: "BreakAssignment", slot_aligned: bool = False) -> Tuple[Tuple[int, int], ...]:
+        spans = [span for span in super()._shifted_spans_of(break_, slot_aligned) if span[0] >= self.not_before]
+        # A spare cashier lets the checkout manager swap in a tobacco checkout for the tobacco ratio
+        return (
+            tuple(span for span in spans if self._leaves_enough_cashiers(break_, *span, spare=1))
+            or tuple(span for span in spans if self._leaves_enough_cashiers(break_, *span))
+        )
+
+    def _leaves_enough_cashiers(self, break_: "BreakAssignment", start_time: int, end_time: int, spare: int = 0) -> bool:
+        """
+        Whether the break can be covered at [start_time, end_time) without the checkout manager running
+        out of cashiers for the checkouts it must fill: the mandatory ones and the ones of covered breaks,
+        which stay required for one tick after the break while the cashier returns. While the break runs
+        its owner is off the checkouts and their checkout is one more to fill, so two cashiers must be
+        left over then, and one in the tick after it.
+        """
+        released_at = end_time + self.tick_minutes
+        moments = {start_time, end_time}
+        for cashier in self.cashiers:
+            shift = cashier.schedule.boundary_interval
+            moments.update((shift.start_time, shift.end_time))
+            for b in cashier.schedule.own_breaks:
+                moments.update((b.start_time, b.end_time, b.end_time + self.tick_minutes))
+        for checkout in self.mandatory_checkouts:
+            opening_hours = checkout.schedule.boundary_interval
+            moments.update((opening_hours.start_time, opening_hours.end_time))
+
+        for minute in moments:
+            if start_time <= minute < released_at:
+                needed = (2 if minute < end_time else 1) + spare
+                if self._cashiers_left_over_at(minute, break_) < needed:
+                    return False
+        return True
+
+    def _cashiers_left_over_at(self, minute: int, break_: "BreakAssignment") -> int:
+        """Cashiers at work at the minute minus the checkouts that must be filled then, with break_ not taken."""
+        left_over = -sum(
+            1 for checkout in self.mandatory_checkouts
+            if checkout.schedule.boundary_interval.start_time <= minute < checkout.schedule.boundary_interval.end_time
+        )
+        for cashier in self.cashiers:
+            if not cashier.is_on_shift_at(minute):
+                continue
+            own_break = cashier.schedule.own_break_at(minute)
+            if own_break is None or own_break is break_:
+                left_over += 1
+            previous_break = cashier.schedule.own_break_at(minute - self.tick_minutes)
+            for b in {own_break, previous_break}:
+                if b is not None and b is not break_ and b.tauottaja is not None:
+                    left_over -= 1
+        return left_over
+
+    def _invalidate_candidates(self, *args, **kwargs) -> None:
+        # Every committed break changes how many cashiers are left over, which the spans of all other breaks depend on
+        self._shifted_spans.clear()
+        self.cache_stats.invalidations += len(self._candidate_cache)
+        self._candidate_cache.clear()
+
+
+class _ReplanCheckoutManager(CheckoutManager):
+    """CheckoutManager that gives a checkout back the cashier it had in the published schedule whenever it can."""
+
+    def __init__(self, *args, published: Dict[Tuple[int, "Checkout"], Cashier], **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        # {(tick start, checkout): cashier} of the schedule before the re-plan
+        self.published = published
+
+    def _reserve_cashiers(self,
+                          unassigned_cashiers: Dict[Cashier, None],
+                          remaining_checkouts: Dict["Checkout", None]) -> Dict["Checkout", Cashier]:
+        """
+        Gives every checkout back its published cashier when they are free, even if another cashier
+        was there in the previous tick, so a cashier pushed elsewhere by the roster change returns
+        as soon as possible. Checkouts whose cashier is on a covered break are left to the tauottaja.
+        """
+        tick_start = self.current_interval.start_time
+        reserved = {}
+        for checkout in remaining_checkouts:
+            cashier = self.published.get((tick_start, checkout))
+            if cashier not in unassigned_cashiers or not cashier.is_available_during(self.current_interval):
+                continue
+            assignment = self.latest_assignments.get(checkout)
+            if assignment is not None and assignment.cashier is cashier:
+                # Already there or back from a break there, the continuity step keeps them
+                continue
+            if isinstance(assignment, CheckoutAssignment):
+                break_assignment, is_on_break = assignment.cashier.is_on_break_during(self.current_interval)
+                if is_on_break and break_assignment.tauottaja is not None:
+                    continue
+            elif isinstance(assignment, BreakAssignment) and assignment.end_time > tick_start:
+                continue
+            reserved[checkout] = cashier
+            del unassigned_cashiers[cashier]
+        return reserved
+
+
+@dataclass
+class ReplanResult:
+    # Start of the first re-planned tick; nothing before it changed
+    freeze_time: int
+    # Breaks that lost their tauottaja or were added for a changed shift, and went through the re-plan
+    replanned_breaks: List[BreakAssignment] = field(default_factory=list)
+    # Rounds of the re-plan, in the format of BreakManager.breaks_schedule_list
+    breaks_schedule_list: List[Dict[str, Any]] = field(default_factory=list)
+    # Minutes after the freeze time where a checkout got another cashier than was published before
+    churned_checkout_minutes: int = 0
+
+
+class Replanner:
+    """
+    Re-plans the rest of a day after roster changes, on top of the schedules made by a
+    BreakManager and a CheckoutManager (and with their options).
+
+    Everything before the freeze time, the start of the first tick at or after "now",
+    stays as it is, and breaks already in progress then run to their end. After it:
+    - breaks of the changed cashiers and breaks they were covering lose their tauottaja
+      and go through a new BreakManager run, together with the breaks a changed shift is
+      still owed. Every other break keeps its time and tauottaja.
+    - checkout assignments are planned again from the freeze time, starting from the
+      assignments running at that moment, so unaffected cashiers keep their checkouts.
+    """
+
+    def __init__(self, break_manager: BreakManager, checkout_manager: CheckoutManager) -> None:
+        self.break_manager = break_manager
+        self.checkout_manager = checkout_manager
+        # Shared with the managers (and the DataManager), so added and removed cashiers show up everywhere
+        self.cashiers: List[Cashier] = break_manager.cashiers
+        self.checkouts: List["Checkout"] = checkout_manager.checkouts
+
+    def freeze_time_for(self, now: int) -> int:
+        """Start of the first checkout tick at or after now."""
+        first_tick_start = self.checkout_manager.config.simulation_start_time
+        tick_minutes = self.checkout_manager.interval_minutes
+        if now <= first_tick_start:
+            return first_tick_start
+        return first_tick_start - (-(now - first_tick_start) // tick_minutes) * tick_minutes
+
+    @instrumentation.timed("replan")
+    def replan(self, deltas: Sequence[RosterDelta], now: int) -> ReplanResult:
+        """
+        Applies the roster changes and re-plans the rest of the day. The re-plan is all or
+        nothing: if it fails, e.g. because too few cashiers are left for the mandatory
+        checkouts, the published schedules and the roster are put back before the error is raised.
+        """
+        freeze_time = self.freeze_time_for(now)
+        changed = self._validate(deltas, freeze_time)
+        published = self._checkout_minutes(freeze_time)
+
+        state = self._capture()
+        try:
+            released, dropped = self._release_breaks(changed, freeze_time)
+            self._truncate_checkout_assignments(freeze_time)
+            released.extend(self._apply_deltas(deltas, changed, freeze_time))
+
+            break_manager = _ReplanBreakManager(
+                self.cashiers, released,
+                workers=self.break_manager.workers,
+                vectorized=self.break_manager.vectorized,
+                trace=self.break_manager.trace,
+                not_before=freeze_time,
+                mandatory_checkouts=[checkout for checkout in self.checkouts if checkout.is_mandatory_open],
+                tick_minutes=self.checkout_manager.interval_minutes,
+            )
+            break_manager.generate_breaks_list()
+
+            checkout_manager = _ReplanCheckoutManager(
+                self.cashiers, self.checkouts, self.checkout_manager.config,
+                interval_minutes=self.checkout_manager.interval_minutes,
+                event_driven=self.checkout_manager.event_driven,
+                trace=self.checkout_manager.trace,
+                start_time=freeze_time,
+                published={(tick_start, checkout): cashier for cashier, checkout, tick_start in published},
+            )
+            checkout_manager.entry_order = [entry for entry in self.checkout_manager.entry_order if entry[0] < freeze_time]
+            checkout_manager.latest_assignments = self._running_assignments(checkout_manager.entry_order, freeze_time)
+            checkout_manager.assign_checkouts_to_cashiers()
+        except BaseException:
+            self._restore(state)
+            raise
+
+        self.checkout_manager = checkout_manager
+        self._update_breaks_schedule_list(released, dropped, break_manager.breaks_schedule_list)
+        replanned = self._checkout_minutes(freeze_time)
+        return ReplanResult(
+            freeze_time=freeze_time,
+            replanned_breaks=released,
+            breaks_schedule_list=break_manager.breaks_schedule_list,
+            churned_checkout_minutes=len(published - replanned) * self.checkout_manager.interval_minutes,
+        )
+
+    def _capture(self) -> Dict[str, Any]:
+        """Everything a re-plan changes in place: the roster, the shifts, the events of every schedule and the assignments."""
+        schedules = [cashier.schedule for cashier in self.cashiers] + [checkout.schedule for checkout in self.checkouts]
+        # Breaks are moved and get another tauottaja and checkout, checkout assignments are cut short and extended
+        assignments = {
+            id(assignment): (assignment, assignment.start_time, assignment.end_time,
+                             assignment.checkout, getattr(assignment, "tauottaja", None))
+            for cashier in self.cashiers
+            for assignment in cashier.schedule.all_events
+        }
+        return {
+            "cashiers": list(self.cashiers),
+            "schedules": [(schedule, schedule.boundary_interval, list(schedule.all_events)) for schedule in schedules],
+            "assignments": list(assignments.values()),
+        }
+
+    def _restore(self, state: Dict[str, Any]) -> None:
+        """Puts back what _capture recorded, dropping whatever the failed re-plan added."""
+        for schedule, _, _ in state["schedules"]:
+            for interval in list(schedule.all_events):
+                schedule.remove_interval(interval)
+        for assignment, start_time, end_time, checkout, tauottaja in state["assignments"]:
+            assignment.start_time, assignment.end_time = start_time, end_time
+            assignment.checkout = checkout
+            if isinstance(assignment, BreakAssignment):
+                assignment.tauottaja = tauottaja
+        for schedule, boundary_interval, events in state["schedules"]:
+            schedule.set_boundary(boundary_interval)
+            for interval in events:
+                schedule.add_interval(interval)
+        # In place, the list is shared with the managers and the DataManager
+        self.cashiers[:] = state["cashiers"]
+
+    def _cashier_named(self, name: str) -> Cashier:
+        matches = [cashier for cashier in self.cashiers if cashier.name == name]
+        if len(matches) != 1:
+            raise ValueError(f"Expected exactly one cashier named '{name}', found {len(matches)}")
+        return matches[0]
+
+    def _validate(self, deltas: Sequence[RosterDelta], freeze_time: int) -> Set[Cashier]:
+        """Checks every delta before anything is changed and returns the existing cashiers they change."""
+        changed: Set[Cashier] = set()
+        for delta in deltas:
+            if isinstance(delta, CashierAdded):
+                if any(cashier.name == delta.name for cashier in self.cashiers):
+                    raise ValueError(f"Cashier '{delta.name}' is already in the roster")
+                if delta.shift_start < freeze_time:
+                    raise ValueError(f"The shift of '{delta.name}' cannot start before the freeze time")
+                if delta.shift_end <= delta.shift_start:
+                    raise ValueError(f"The shift of '{delta.name}' must end after it starts")
+                continue
+
+            cashier = self._cashier_named(delta.name)
+            if cashier in changed:
+                raise ValueError(f"Cashier '{delta.name}' has more than one roster change")
+            changed.add(cashier)
+            if isinstance(delta, ShiftChanged):
+                shift = cashier.schedule.boundary_interval
+                if delta.shift_start != shift.start_time and min(delta.shift_start, shift.start_time) < freeze_time:
+                    raise ValueError(f"The shift of '{delta.name}' cannot start before the freeze time or after it has started")
+                if delta.shift_end <= delta.shift_start or delta.shift_end < self._frozen_end(cashier, freeze_time):
+                    raise ValueError(f"The shift of '{delta.name}' cannot end before the freeze time or a break in progress")
+            elif not isinstance(delta, CashierAbsent):
+                raise ValueError(f"Unknown roster change: {delta!r}")
+        return changed
+
+    @staticmethod
+    def _frozen_end(cashier: Cashier, freeze_time: int) -> int:
+        """When whatever the cashier is doing at the freeze time ends: checkout assignments are cut there, breaks are not."""
+        return max([freeze_time] + [
+            interval.end_time if isinstance(interval, BreakAssignment) else min(interval.end_time, freeze_time)
+            for interval in cashier.schedule.all_events
+            if interval.start_time < freeze_time
+        ])
+
+    def _release_breaks(self, changed: Set[Cashier], freeze_time: int) -> Tuple[List[BreakAssignment], Set[int]]:
+        """
+        Takes every break starting at or after the freeze time off its checkout, and releases the
+        ones of and covered by the changed cashiers. The changed cashiers' own breaks are dropped,
+        they get new ones for their new shift. Returns (released breaks, ids of dropped breaks).
+        """
+        released: List[BreakAssignment] = []
+        dropped: Set[int] = set()
+        for cashier in self.cashiers:
+            for break_assignment in [b for b in cashier.schedule.own_breaks if b.start_time >= freeze_time]:
+                if break_assignment.checkout is not None:
+                    break_assignment.checkout.schedule.remove_interval(break_assignment)
+                    break_assignment.checkout = None
+                if cashier not in changed and break_assignment.tauottaja not in changed:
+                    continue
+                if break_assignment.tauottaja is not None:
+                    break_assignment.tauottaja.schedule.remove_interval(break_assignment)
+                    break_assignment.tauottaja = None
+                if cashier in changed:
+                    cashier.schedule.remove_interval(break_assignment)
+                    dropped.add(id(break_assignment))
+                else:
+                    released.append(break_assignment)
+        return released, dropped
+
+    def _truncate_checkout_assignments(self, freeze_time: int) -> None:
+        """Removes the checkout assignments after the freeze time and cuts the ones running at it short."""
+        for cashier in self.cashiers:
+            for assignment in [a for a in cashier.schedule.checkout_assignments if a.end_time > freeze_time]:
+                cashier.schedule.remove_interval(assignment)
+                assignment.checkout.schedule.remove_interval(assignment)
+                if assignment.start_time < freeze_time:
+                    assignment.end_time = freeze_time
+                    cashier.schedule.add_interval(assignment)
+                    assignment.checkout.assign_cashier(assignment)
+
+    def _apply_deltas(self, deltas: Sequence[RosterDelta], changed: Set[Cashier], freeze_time: int) -> List[BreakAssignment]:
+        """Changes the shifts, and returns the breaks the changed and added shifts are still owed."""
+        owed: List[BreakAssignment] = []
+        for delta in deltas:
+            if isinstance(delta, CashierAdded):
+                cashier = Cashier(delta.name, None)
+                cashier.schedule = CashierScheduleCollection(TimeInterval(delta.shift_start, delta.shift_end), cashier)
+                self.cashiers.append(cashier)
+                owed.extend(cashier.schedule.add_remaining_breaks(freeze_time))
+                continue
+
+            cashier = self._cashier_named(delta.name)
+            shift = cashier.schedule.boundary_interval
+            if isinstance(delta, ShiftChanged):
+                cashier.schedule.set_boundary(TimeInterval(delta.shift_start, delta.shift_end))
+                owed.extend(cashier.schedule.add_remaining_breaks(freeze_time))
+                continue
+
+            # Absent: the shift ends at the freeze time, or when a break in progress then ends
+            shift_end = self._frozen_end(cashier, freeze_time)
+            if shift_end <= shift.start_time:
+                self.cashiers.remove(cashier)
+            else:
+                cashier.schedule.set_boundary(TimeInterval(shift.start_time, min(shift.end_time, shift_end)))
+        return owed
+
+    def _running_assignments(self,
+                             entry_order: List[Tuple[int, "Checkout"]],
+                             freeze_time: int) -> Dict["Checkout", Union[CheckoutAssignment, BreakAssignment]]:
+        """
+        The assignment of every checkout in the tick before the freeze time, which the re-plan
+        continues from, in the order the CheckoutManager had them (see CheckoutManager.entry_order).
+        """
+        last_entry = {checkout: position for position, (_, checkout) in enumerate(entry_order)}
+        running = []
+        for checkout in self.checkouts:
+            assignment = checkout.schedule.intervals.interval_at(freeze_time - 1)
+            if assignment is not None:
+                running.append((last_entry.get(checkout, -1), checkout, assignment))
+        running.sort(key=lambda item: item[0])
+        return {checkout: assignment for _, checkout, assignment in running}
+
+    def _checkout_minutes(self, freeze_time: int) -> Set[Tuple[Cashier, "Checkout", int]]:
+        """(cashier, checkout, tick start) of every tick after the freeze time someone is at a checkout."""
+        tick_minutes = self.checkout_manager.interval_minutes
+        ticks = set()
+        for checkout in self.checkouts:
+            for assignment in checkout.schedule.all_events:
+                cashier = assignment.tauottaja if isinstance(assignment, BreakAssignment) else assignment.cashier
+                for tick_start in range(max(assignment.start_time, freeze_time), assignment.end_time, tick_minutes):
+                    ticks.add((cashier, checkout, tick_start))
+        return ticks
+
+    def _update_breaks_schedule_list(self,
+                                     released: List[BreakAssignment],
+                                     dropped: Set[int],
+                                     replanned: List[Dict[str, Any]]) -> None:
+        """Takes the released and dropped breaks out of the original breaks list and appends the re-plan."""
+        gone = dropped | {id(b) for b in released}
+        breaks_schedule_list = []
+        for item in self.break_manager.breaks_schedule_list:
+            kept = [b for b in item["breaks_covered"] if id(b) not in gone]
+            if not kept:
+                continue
+            if len(kept) < len(item["breaks_covered"]):
+                removed_minutes = sum(b.length_in_minutes() for b in item["breaks_covered"] if id(b) in gone)
+                item = {**item, "breaks_covered": kept, "total_minutes": item["total_minutes"] - removed_minutes}
+            breaks_schedule_list.append(item)
+        self.break_manager.breaks_schedule_list = breaks_schedule_list + replanned
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from ..models import CheckoutAssignment
+from ..utils import instrumentation
+
+if TYPE_CHECKING:
+    from ..models import BreakAssignment, Cashier, Checkout
+    from .break_manager import BreakManager
+    from .checkout_manager import CheckoutManager
+
+# Bumped when the layout of the cache entries changes
+RESULT_CACHE_VERSION = 2
+# Subpackages whose source decides the result of a run; any change to them invalidates the cache
+ALGORITHM_PACKAGES = ("collections", "managers", "models", "utils")
+
+
+@lru_cache(maxsize=None)
+def algorithm_fingerprint() -> str:
+    """Hash of the source of ALGORITHM_PACKAGES, so entries made by another version of the code are never used."""
+    root = Path(__file__).parent.parent
+    digest = hashlib.sha256()
+    for package in ALGORITHM_PACKAGES:
+        for path in sorted((root / package).glob("*.py")):
+            digest.update(f"{package}/{path.name}\0".encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _constants(cls: type) -> Dict[str, Any]:
+    """The upper case class attributes of a manager, which are its tunable constants."""
+    return {name: getattr(cls, name) for name in dir(cls) if name.isupper()}
+
+
+def _canonical_config(config: Any) -> Dict[str, Any]:
+    canonical = {}
+    for config_field in fields(config):
+        if not config_field.init:
+            continue
+        value = getattr(config, config_field.name)
+        canonical[config_field.name] = sorted(value) if isinstance(value, frozenset) else value
+    return canonical
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class ResultCache:
+    """
+    On-disk cache of whole scheduling runs. An entry is keyed by the sha256 of the
+    roster, the checkouts, the compiled config, the constants of both managers and
+    the source of the algorithm, and holds the final breaks and checkout assignments
+    as indices into the cashier and checkout lists, so a hit rebuilds the schedules
+    without running either manager.
+
+    Entries are written to a temporary file and renamed into place, so a reader never
+    sees half an entry. Every hit touches the entry, and after every write the least
+    recently used entries are removed until at most max_entries entries and max_bytes
+    bytes are left.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024) -> None:
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("max_entries and max_bytes must be at least 1")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = ResultCacheStats()
+
+    # --- Keys ---
+    def key_for(self, break_manager: "BreakManager", checkout_manager: "CheckoutManager") -> str:
+        """Content hash of everything the result of running both managers depends on."""
+        material = {
+            "version": RESULT_CACHE_VERSION,
+            "algorithm": algorithm_fingerprint(),
+            "cashiers": [
+                [
+                    cashier.name,
+                    cashier.schedule.boundary_interval.start_time,
+                    cashier.schedule.boundary_interval.end_time,
+                    [[b.start_time, b.end_time] for b in cashier.schedule.own_breaks],
+                ]
+                for cashier in break_manager.cashiers
+            ],
+            "checkouts": [
+                [
+                    checkout.identifier,
+                    checkout.schedule.boundary_interval.start_time,
+                    checkout.schedule.boundary_interval.end_time,
+                    checkout.is_tobacco_checkout,
+                    checkout.is_mandatory_open,
+                    checkout in checkout_manager.ratio_pool_checkouts,
+                ]
+                for checkout in checkout_manager.checkouts
+            ],
+            "config": _canonical_config(checkout_manager.config),
+            "break_manager": _constants(type(break_manager)),
+            "checkout_manager": {
+                **_constants(type(checkout_manager)),
+                "interval_minutes": checkout_manager.interval_minutes,
+            },
+        }
+        canonical = json.dumps(material, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    # --- Entries ---
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The entry stored under key, or None. Unreadable or outdated entries are removed."""
+        path = self._path(key)
+        try:
+            with open(path, "r") as json_file:
+                entry = json.load(json_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self._remove(path)
+            return None
+        if entry.get("version") != RESULT_CACHE_VERSION or entry.get("key") != key:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Atomically stores entry under key, then evicts the least recently used entries over the limits."""
+        entry = {**entry, "version": RESULT_CACHE_VERSION, "key": key}
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "w") as json_file:
+                json.dump(entry, json_file, separators=(",", ":"))
+                json_file.flush()
+                os.fsync(json_file.fileno())
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            self._remove(Path(temporary_path))
+            raise
+        self._evict()
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            self._remove(path)
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+
+        entry_count = len(entries)
+        total_bytes = sum(size for _, size, _ in entries)
+        # The newest entry, the one just written, is always kept
+        for _, size, path in entries[:-1]:
+            if entry_count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            self._remove(path)
+            self.stats.evictions += 1
+            entry_count -= 1
+            total_bytes -= size
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    # --- Runs ---
+    def run(self, break_manager: "BreakManager", checkout_manager: "CheckoutManager") -> bool:
+        """
+        Runs generate_breaks_list and assign_checkouts_to_cashiers, or on a hit rebuilds
+        their result from the cache. Either way the cashier and checkout schedules and
+        break_manager.breaks_schedule_list end up the same. Returns whether it was a hit.
+        The managers must not have run yet.
+        """
+        key = self.key_for(break_manager, checkout_manager)
+        entry = self.get(key)
+        if entry is not None:
+            self.stats.hits += 1
+            instrumentation.count("result_cache_hits")
+            self._restore(entry, break_manager, checkout_manager)
+            return True
+
+        self.stats.misses += 1
+        instrumentation.count("result_cache_misses")
+        # Own breaks in load order; entries refer to them by their position in this list
+        breaks = [b for cashier in break_manager.cashiers for b in cashier.schedule.own_breaks]
+        break_manager.generate_breaks_list()
+        checkout_manager.assign_checkouts_to_cashiers()
+        self.put(key, self._capture(breaks, break_manager, checkout_manager))
+        return False
+
+    @staticmethod
+    def _capture(breaks: List["BreakAssignment"],
+                 break_manager: "BreakManager",
+                 checkout_manager: "CheckoutManager") -> Dict[str, Any]:
+        cashier_indexes = {cashier: index for index, cashier in enumerate(break_manager.cashiers)}
+        checkout_indexes = {checkout: index for index, checkout in enumerate(checkout_manager.checkouts)}
+        break_indexes = {id(b): index for index, b in enumerate(breaks)}
+
+        def cashier_index(cashier: Optional["Cashier"]) -> Optional[int]:
+            return cashier_indexes[cashier] if cashier is not None else None
+
+        def checkout_index(checkout: Optional["Checkout"]) -> Optional[int]:
+            return checkout_indexes[checkout] if checkout is not None else None
+
+        return {
+            # [start_time, end_time, tauottaja, checkout] of every own break, in load order
+            "breaks": [
+                [b.start_time, b.end_time, cashier_index(b.tauottaja), checkout_index(b.checkout)]
+                for b in breaks
+            ],
+            # [cashier, checkout, start_time, end_time]
+            "checkout_assignments": [
+                [cashier_index(assignment.cashier), checkout_index(assignment.checkout),
+                 assignment.start_time, assignment.end_time]
+                for cashier in break_manager.cashiers
+                for assignment in cashier.schedule.checkout_assignments
+            ],
+            # [tauottaja, [break, ...], total_minutes]
+            "breaks_schedule_list": [
+                [cashier_index(item["tauottaja"]), [break_indexes[id(b)] for b in item["breaks_covered"]],
+                 item["total_minutes"]]
+                for item in break_manager.breaks_schedule_list
+            ],
+            # [tick start_time, checkout] of CheckoutManager.entry_order, which a re-plan needs
+            "entry_order": [[tick_start, checkout_index(checkout)] for tick_start, checkout in checkout_manager.entry_order],
+        }
+
+    @staticmethod
+    def _restore(entry: Dict[str, Any],
+                 break_manager: "BreakManager",
+                 checkout_manager: "CheckoutManager") -> None:
+        cashiers = break_manager.cashiers
+        checkouts = checkout_manager.checkouts
+        breaks = [b for cashier in cashiers for b in cashier.schedule.own_breaks]
+
+        # Take every moved break out first, so no break collides with another one's old position
+        moved = [
+            (b, start_time, end_time)
+            for b, (start_time, end_time, _, _) in zip(breaks, entry["breaks"])
+            if (b.start_time, b.end_time) != (start_time, end_time)
+        ]
+        for b, _, _ in moved:
+            b.cashier.schedule.remove_interval(b)
+        for b, start_time, end_time in moved:
+            b.start_time, b.end_time = start_time, end_time
+            b.cashier.schedule.add_interval(b)
+
+        for b, (_, _, tauottaja, checkout) in zip(breaks, entry["breaks"]):
+            if tauottaja is not None:
+                b.tauottaja = cashiers[tauottaja]
+                b.tauottaja.add_interval(b)
+            if checkout is not None:
+                b.checkout = checkouts[checkout]
+                b.checkout.assign_cashier(b)
+
+        for cashier, checkout, start_time, end_time in entry["checkout_assignments"]:
+            assignment = CheckoutAssignment(start_time, end_time, cashiers[cashier], checkouts[checkout])
+            assignment.cashier.add_interval(assignment)
+            assignment.checkout.assign_cashier(assignment)
+        checkout_manager.entry_order = [(tick_start, checkouts[checkout]) for tick_start, checkout in entry["entry_order"]]
+
+        break_manager.breaks_schedule_list = [
+            {
+                "tauottaja": cashiers[tauottaja] if tauottaja is not None else None,
+                "breaks_covered": [breaks[index] for index in covered],
+                "total_minutes": total_minutes,
+            }
+            for tauottaja, covered, total_minutes in entry["breaks_schedule_list"]
+        ]
@@ -0,0 +1,103 @@
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+from ..utils import MINUTES_PER_HOUR, import_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .break_manager import CoverageResult, CoverageScoring, PoolEntry
+
+
+def slot_mask_to_array(mask: int, slot_count: int) -> "np.ndarray":
+    """Bool array of slot_count slots, True where the bit of the slot is set in mask."""
+    np = import_numpy("slot_mask_to_array")
+    mask_bytes = mask.to_bytes((slot_count + 7) // 8, "little")
+    return np.unpackbits(np.frombuffer(mask_bytes, dtype=np.uint8), count=slot_count, bitorder="little").astype(bool)
+
+
+def _mask_slice(mask: int) -> slice:
+    """The slots of a contiguous slot mask as a slice."""
+    return slice((mask & -mask).bit_length() - 1, mask.bit_length())
+
+
+def simulate_coverage_vectorized(free_slots: List[int],
+                                 pool: List["PoolEntry"],
+                                 cashier_indexes: List[int],
+                                 scoring: "CoverageScoring",
+                                 positions: Optional[Iterable[int]] = None) -> List["CoverageResult"]:
+    """
+    simulate_coverage for many cashiers at once. The pool is walked once, and every
+    step decides the fitting shift, the claimed slots and the score of one break for
+    all cashiers with array operations over a (cashier, slot) matrix of free slots.
+    Only works on slot aligned pools (see _simulate_coverage_slots), and gives the
+    same results, including the earliest end time tie-breaker.
+    positions limits the walk to those pool entries (ascending); every entry one
+    of the cashiers could reach must be included.
+    """
+    np = import_numpy("BreakManager(vectorized=True)")
+    cashier_count = len(free_slots)
+    if cashier_count == 0:
+        return []
+
+    slot_count = max(
+        [mask.bit_length() for mask in free_slots]
+        + [reach_mask.bit_length() for _, _, _, _, _, _, reach_mask in pool]
+        + [1]
+    )
+    free = np.stack([slot_mask_to_array(mask, slot_count) for mask in free_slots])
+    owners = np.array(cashier_indexes)
+    totals = np.zeros(cashier_count)
+    # No break ends before the day origin, so -1 never counts as consecutive
+    last_end_times = np.full(cashier_count, -1, dtype=np.int64)
+    reachable = np.zeros((cashier_count, len(pool)), dtype=bool)
+    # Index of the shift each cashier planned for each break, -1 if not planned
+    chosen_shifts = np.full((cashier_count, len(pool)), -1, dtype=np.int8)
+
+    for position in range(len(pool)) if positions is None else positions:
+        owner_index, _, _, length, shifted_spans, shifted_masks, reach_mask = pool[position]
+        # Own breaks are never covered by the cashier themselves, and breaks that cannot
+        # land in the free slots at any shift are skipped
+        eligible = (owners != owner_index) & free[:, _mask_slice(reach_mask)].any(axis=1)
+        if not eligible.any():
+            continue
+        reachable[:, position] = eligible
+        if not shifted_spans:
+            continue
+
+        # The rest only looks at the cashiers the break can reach
+        rows = np.flatnonzero(eligible)
+        shift_slots = [_mask_slice(mask) for mask in shifted_masks]
+        fits = np.stack([free[rows, slots].all(axis=1) for slots in shift_slots], axis=1)
+        planned = fits.any(axis=1)
+        if not planned.any():
+            continue
+        rows = rows[planned]
+        fits = fits[planned]
+
+        starts = np.array([span[0] for span in shifted_spans])
+        ends = np.array([span[1] for span in shifted_spans])
+        # argmin keeps the first of equal end times, like the strict comparison of the loop version
+        best_shifts = np.where(fits, ends, np.iinfo(np.int64).max).argmin(axis=1)
+        for shift, slots in enumerate(shift_slots):
+            free[rows[best_shifts == shift], slots] = False
+
+        planned_starts = starts[best_shifts]
+        planned_ends = ends[best_shifts]
+        bonus = np.where(planned_starts == last_end_times[rows], scoring.consecutive_bonus, 0) + np.where(
+            (planned_ends // MINUTES_PER_HOUR) % 24 < scoring.early_boundary_hour,
+            scoring.early_bonus,
+            np.where((planned_starts // MINUTES_PER_HOUR) % 24 >= scoring.late_boundary_hour, scoring.late_bonus, 0),
+        )
+        totals[rows] += length + bonus
+        last_end_times[rows] = planned_ends
+        chosen_shifts[rows, position] = best_shifts
+
+    results = []
+    for cashier_shifts, total, cashier_reachable in zip(chosen_shifts, totals.tolist(), reachable):
+        planned_positions = np.flatnonzero(cashier_shifts >= 0)
+        planned = [
+            (position, *pool[position][4][shift])
+            for position, shift in zip(planned_positions.tolist(), cashier_shifts[planned_positions].tolist())
+        ]
+        results.append((total if planned else 0, planned, np.flatnonzero(cashier_reachable).tolist()))
+    return results
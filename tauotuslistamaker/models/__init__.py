@@ -5,3 +5,4 @@ from .checkout import Checkout
 from .break_assignment import BreakAssignment
 from .checkout_assignment import CheckoutAssignment
 from .base_assignment import BaseAssignment
+from .scheduling_config import SchedulingConfig
@@ -1,13 +1,12 @@
 from . import TimeInterval
-from datetime import datetime
-from typing import Optional, TYPE_CHECKING
+from typing import Optional
 from .cashier import Cashier
-
-if TYPE_CHECKING:
-    from . import Checkout
+from .checkout import Checkout
 
 class AvailableInterval(TimeInterval):
-    def __init__(self, start_time: datetime, end_time: datetime, cashier: Optional['Cashier'] = None, checkout: Optional['Checkout'] = None) -> None:
+    __slots__ = ("cashier", "checkout")
+
+    def __init__(self, start_time: int, end_time: int, cashier: Optional['Cashier'] = None, checkout: Optional['Checkout'] = None) -> None:
             super().__init__(start_time, end_time)
             self.cashier = cashier
             self.checkout = checkout
@@ -27,9 +26,9 @@ class AvailableInterval(TimeInterval):
                 raise TypeError("checkout must be a Checkout instance.")
     
     @classmethod
-    def for_cashier(cls, start_time: datetime, end_time: datetime, cashier: 'Cashier') -> "AvailableInterval":
+    def for_cashier(cls, start_time: int, end_time: int, cashier: 'Cashier') -> "AvailableInterval":
         return cls(start_time, end_time, cashier=cashier)
     
     @classmethod
-    def for_checkout(cls, start_time: datetime, end_time: datetime, checkout: 'Checkout') -> "AvailableInterval":
+    def for_checkout(cls, start_time: int, end_time: int, checkout: 'Checkout') -> "AvailableInterval":
         return cls(start_time, end_time, checkout=checkout)
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from copy import deepcopy
-from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Sequence
+
+from ..utils import ReadOnlyView, instrumentation
 
 
 if TYPE_CHECKING:
-    from ..collections import CashierScheduleCollection
+    from ..collections import CashierScheduleCollection, ScheduleSnapshot
     from .break_assignment import BreakAssignment
     from .time_interval import TimeInterval
     from .available_interval import AvailableInterval
@@ -18,19 +19,23 @@ class Cashier:
         self.schedule = schedule
 
     @property
-    def availability(self) -> tuple["AvailableInterval", ...]:
-        """Read-only snapshot of this cashier's available time intervals."""
-        return tuple(self.schedule.availability)
+    def availability(self) -> ReadOnlyView["AvailableInterval"]:
+        """Read-only view of this cashier's available time intervals."""
+        return ReadOnlyView(self.schedule.availability)
+
+    def availability_mask(self) -> int | None:
+        """Free quarter-hour slots as a bitmask, or None if the schedule is not slot aligned."""
+        return self.schedule.availability_mask()
 
     @property
-    def breaks(self) -> tuple["BreakAssignment", ...]:
-        """Read-only snapshot of this cashier's scheduled breaks."""
-        return tuple(self.schedule.all_breaks)
+    def breaks(self) -> ReadOnlyView["BreakAssignment"]:
+        """Read-only view of this cashier's scheduled breaks."""
+        return self.schedule.all_breaks
 
     @property
-    def events(self) -> tuple["TimeInterval", ...]:
-        """Read-only snapshot of every scheduled interval for the cashier."""
-        return tuple(self.schedule.all_events)
+    def events(self) -> ReadOnlyView["TimeInterval"]:
+        """Read-only view of every scheduled interval for the cashier."""
+        return ReadOnlyView(self.schedule.all_events)
 
     def add_interval(self, interval: "TimeInterval") -> None:
         """Add an interval to the cashier's schedule."""
@@ -45,6 +50,10 @@ class Cashier:
     ) -> tuple[bool, "AvailableInterval" | None]:
         """Attempt to move an interval while keeping validations encapsulated."""
         return self.schedule.try_move_interval(interval, minutes_to_move, commit=commit)
+
+    def feasible_moves(self, interval: "TimeInterval", offsets: Sequence[int]) -> list[tuple[int, int, int]]:
+        """Side-effect free (offset, start_time, end_time) for every offset the interval could move by."""
+        return self.schedule.feasible_moves(interval, offsets)
     
     def is_available_during(self, interval: "TimeInterval") -> bool:
         """Check if the cashier is available during the entire specified interval."""
@@ -62,14 +71,20 @@ class Cashier:
         """Check if the cashier is a tauottaja during the entire specified interval."""
         return self.schedule.is_assigned_to_checkout_or_available_during(interval)
 
-    def is_on_shift_at(self, date_time: "datetime") -> bool:
-        """Check if the cashier is on shift at the specified date and time."""
-        return self.schedule.is_on_shift_at(date_time)
+    def is_on_shift_at(self, minute: int) -> bool:
+        """Check if the cashier is on shift at the specified minute from the day origin."""
+        return self.schedule.is_on_shift_at(minute)
 
     def copy_schedule(self) -> "CashierScheduleCollection":
         """Provide a detached copy of the underlying schedule for simulations."""
+        instrumentation.count("deepcopies")
         return deepcopy(self.schedule)
-    
+
+    def snapshot_schedule(self) -> "ScheduleSnapshot":
+        """Provide a copy-on-write snapshot of the schedule for simulations; changes stay in it until committed."""
+        return self.schedule.snapshot()
+
     def copy_availability(self) -> list["AvailableInterval"]:
         """Provide a detached copy of the current availability for simulations."""
-        return deepcopy(self.availability)
\ No newline at end of file
+        # The gaps are replaced rather than mutated when the schedule changes, so sharing them is safe
+        return list(self.schedule.availability)
\ No newline at end of file
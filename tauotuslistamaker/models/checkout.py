@@ -6,7 +6,7 @@ if TYPE_CHECKING:
     from . import CheckoutAssignment
     
 class Checkout:
-    def __init__(self, identifier: Union[str, int], schedule: "CheckoutScheduleCollection", is_tobacco_checkout: bool, is_mandatory_open: bool) -> None:
+    def __init__(self, identifier: Union[str, int], schedule: "CheckoutScheduleCollection", is_tobacco_checkout: bool, is_mandatory_open: bool, is_in_ratio_pool: bool = False) -> None:
         if isinstance(identifier, str): 
             self.identifier = identifier
         elif isinstance(identifier, int):
@@ -16,6 +16,8 @@ class Checkout:
         self.schedule = schedule
         self.is_tobacco_checkout = is_tobacco_checkout
         self.is_mandatory_open = is_mandatory_open
+        # Whether the checkout is counted in the tobacco ratio (listed in 'tobacco_ratio_pool')
+        self.is_in_ratio_pool = is_in_ratio_pool
     
     def is_within_boundary(self, interval: "TimeInterval") -> bool:
         """Check if the checkout is open during the entire specified interval."""
@@ -1,12 +1,17 @@
 from .base_assignment import BaseAssignment
-from datetime import datetime, timedelta
 from . import Cashier
 from . import Checkout
 
 class CheckoutAssignment(BaseAssignment):
-    def __init__(self, start_time: datetime, end_time: datetime, cashier: Cashier, checkout: Checkout):
+    __slots__ = ()
+
+    def __init__(self, start_time: int, end_time: int, cashier: Cashier, checkout: Checkout):
         super().__init__(start_time, end_time, cashier, checkout)
 
     def extend(self, minutes: int) -> None:
         """Extend the end time of the assignment by the specified number of minutes."""
-        self.end_time += timedelta(minutes=minutes)
+        previous_end_time = self.end_time
+        self.end_time += minutes
+        # Both schedules holding this assignment keep their free time current
+        self.cashier.schedule.interval_extended(self, previous_end_time)
+        self.checkout.schedule.interval_extended(self, previous_end_time)
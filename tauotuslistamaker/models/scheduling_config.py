@@ -0,0 +1,89 @@
+from dataclasses import dataclass, field, fields
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Mapping, Tuple
+
+if TYPE_CHECKING:
+    from .checkout import Checkout
+
+
+@dataclass(frozen=True)
+class SchedulingConfig:
+    """
+    Immutable, precompiled form of the checkout configuration. Built once by
+    DataManager.load_config so the CheckoutManager never has to re-derive
+    lookups from the raw json, and small enough to ship to worker processes.
+    """
+    TOBACCO_RATIO_MAX_TOTAL_CHECKOUTS_KEY = "max_total_checkouts"
+    TOBACCO_RATIO_TOBACCO_CHECKOUTS_KEY = "tobacco_checkouts"
+
+    simulation_start_time: int
+    simulation_end_time: int
+    # Checkout identifiers as strings, in the configured filling order
+    checkouts_filling_order: Tuple[str, ...]
+    # Identifiers of the checkouts counted in the tobacco ratio
+    ratio_pool: frozenset
+    # (max_total_checkouts, tobacco_checkouts) pairs sorted by max_total_checkouts
+    tobacco_checkout_ratios: Tuple[Tuple[int, int], ...]
+    # Partitions of the checkout identifiers, in checkout order
+    mandatory_checkouts: Tuple[str, ...]
+    optional_checkouts: Tuple[str, ...]
+    tobacco_checkouts: Tuple[str, ...]
+    regular_checkouts: Tuple[str, ...]
+
+    # Derived lookups, built in __post_init__
+    filling_ranks: Mapping[str, int] = field(init=False, repr=False, compare=False)
+    required_tobacco_table: Tuple[int, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        filling_ranks = {}
+        for rank, identifier in enumerate(self.checkouts_filling_order):
+            filling_ranks.setdefault(identifier, rank)
+        object.__setattr__(self, "filling_ranks", MappingProxyType(filling_ranks))
+
+        # required_tobacco_table[n] is the tobacco requirement for a pool of n open checkouts.
+        # Every pool larger than the biggest max_total_checkouts gets the last ratio, so the
+        # table ends one past it and lookups beyond that read the last entry.
+        table_size = max((max_total for max_total, _ in self.tobacco_checkout_ratios), default=0) + 2
+        table = [0]
+        for pool_size in range(1, table_size):
+            required = 0
+            if self.tobacco_checkout_ratios:
+                required = self.tobacco_checkout_ratios[-1][1]
+                for max_total, tobacco in self.tobacco_checkout_ratios:
+                    if pool_size <= max_total:
+                        required = tobacco
+                        break
+            table.append(required)
+        object.__setattr__(self, "required_tobacco_table", tuple(table))
+
+    def __reduce__(self):
+        # The read-only mapping proxy cannot be pickled, so rebuild from the init fields instead
+        return self.__class__, tuple(getattr(self, f.name) for f in fields(self) if f.init)
+
+    @classmethod
+    def compile(cls, config: dict[str, Any], checkouts: list["Checkout"]) -> "SchedulingConfig":
+        """Compiles the processed config dictionary of DataManager.load_config and its checkouts."""
+        ratios = sorted(
+            (
+                (ratio[cls.TOBACCO_RATIO_MAX_TOTAL_CHECKOUTS_KEY], ratio[cls.TOBACCO_RATIO_TOBACCO_CHECKOUTS_KEY])
+                for ratio in config.get("tobacco_checkout_ratios") or []
+            ),
+            key=lambda ratio: ratio[0],
+        )
+        return cls(
+            simulation_start_time=config.get("simulation_start_time"),
+            simulation_end_time=config.get("simulation_end_time"),
+            checkouts_filling_order=tuple(str(identifier) for identifier in config.get("checkouts_filling_order")),
+            ratio_pool=frozenset(str(identifier) for identifier in config.get("tobacco_ratio_pool")),
+            tobacco_checkout_ratios=tuple(ratios),
+            mandatory_checkouts=tuple(c.identifier for c in checkouts if c.is_mandatory_open),
+            optional_checkouts=tuple(c.identifier for c in checkouts if not c.is_mandatory_open),
+            tobacco_checkouts=tuple(c.identifier for c in checkouts if c.is_tobacco_checkout),
+            regular_checkouts=tuple(c.identifier for c in checkouts if not c.is_tobacco_checkout),
+        )
+
+    def required_tobacco(self, pool_size: int) -> int:
+        """Number of tobacco checkouts required when pool_size checkouts of the ratio pool are open."""
+        if pool_size <= 0:
+            return 0
+        return self.required_tobacco_table[min(pool_size, len(self.required_tobacco_table) - 1)]
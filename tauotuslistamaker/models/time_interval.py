@@ -1,33 +1,38 @@
 from datetime import datetime
-from datetime import timedelta
+from ..utils.time import datetime_to_minutes
 
 class TimeInterval:
-    def __init__(self, start_time: datetime, end_time: datetime) -> None:
+    # start_time and end_time are whole minutes from DAY_ORIGIN (see utils.time),
+    # so every comparison below is a plain int comparison.
+    __slots__ = ("start_time", "end_time")
+
+    def __init__(self, start_time: int, end_time: int) -> None:
+        if not isinstance(start_time, int) or not isinstance(end_time, int):
+            raise ValueError("Start time and end time must be whole minutes (int)")
         if start_time >= end_time:
             raise ValueError("Start time must start before end time")
-        if not isinstance(start_time, datetime) or not isinstance(end_time, datetime):
-            raise ValueError("Start time and end time must be datetime objects")
         self.start_time = start_time
         self.end_time = end_time
 
+    @classmethod
+    def from_datetimes(cls, start_time: datetime, end_time: datetime) -> "TimeInterval":
+        return cls(datetime_to_minutes(start_time), datetime_to_minutes(end_time))
+
     @property
     def duration_minutes(self) -> int:
-        return int((self.end_time - self.start_time).total_seconds() / 60)
+        return self.end_time - self.start_time
     
     def contains(self, interval: "TimeInterval") -> bool:
-        if not isinstance(interval, TimeInterval):
-            raise ValueError("Interval must be a TimeInterval object")
         return self.start_time <= interval.start_time and self.end_time >= interval.end_time
 
+    def contains_span(self, start_time: int, end_time: int) -> bool:
+        """Same as contains, for bounds that have no TimeInterval object."""
+        return self.start_time <= start_time and self.end_time >= end_time
+
     def overlaps(self, interval: "TimeInterval") -> bool:
-        if not isinstance(interval, TimeInterval):
-            raise ValueError("Interval must be a TimeInterval object")
         return self.start_time < interval.end_time and self.end_time > interval.start_time
                 
     def subtract(self, interval: "TimeInterval") -> list["TimeInterval"]:
-        if not isinstance(interval, TimeInterval):
-            raise ValueError("Interval must be a TimeInterval object")
-        
         if not self.overlaps(interval):
             raise ValueError("Intervals do not overlap")
         
@@ -41,10 +46,9 @@ class TimeInterval:
 
         return result_intervals
     
-    def length_in_minutes(self):
-        return (self.end_time - self.start_time).total_seconds() / 60
+    def length_in_minutes(self) -> float:
+        return float(self.end_time - self.start_time)
     
     def move_by_minutes(self, minutes: int) -> None:
-        self.start_time += timedelta(minutes=minutes)
-        self.end_time += timedelta(minutes=minutes)
-        
\ No newline at end of file
+        self.start_time += minutes
+        self.end_time += minutes
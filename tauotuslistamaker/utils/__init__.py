@@ -1 +1,18 @@
-from .time import round_time_to_nearest_quarter, time_diff_in_minutes
\ No newline at end of file
+from .time import (
+    DAY_ORIGIN,
+    MINUTES_PER_DAY,
+    MINUTES_PER_HOUR,
+    SLOT_MINUTES,
+    round_time_to_nearest_quarter,
+    time_diff_in_minutes,
+    datetime_to_minutes,
+    minutes_to_datetime,
+    format_minutes,
+    hour_of_day,
+    is_slot_aligned,
+    span_to_slot_mask,
+    ticks_near,
+)
+from .read_only_view import ReadOnlyView
+from .instrumentation import Instrumentation, PhaseStats, instrumentation
+from .optional import import_numpy
\ No newline at end of file
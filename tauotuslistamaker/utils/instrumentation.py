@@ -0,0 +1,141 @@
+import cProfile
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_DISABLED_PHASE = nullcontext()
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    # Highest traced memory during any call, only recorded for top level phases with trace_memory
+    peak_bytes: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        stats = {
+            "calls": self.calls,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+        if self.peak_bytes is not None:
+            stats["peak_bytes"] = self.peak_bytes
+        return stats
+
+
+class Instrumentation:
+    """
+    Phase timers and hot-path counters for finding out where a run spends its time.
+    Disabled by default, and then count() returns at once and phase() hands out a
+    shared no-op context manager, so the calls can stay in the hot paths.
+
+    Phases nest: "generate_breaks_list" contains its "generate_breaks_list.round"s.
+    cProfile and tracemalloc only follow the top level phases, since neither of them
+    can measure a nested phase without disturbing the phase around it.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.profile = False
+        self.trace_memory = False
+        self.reset()
+
+    def reset(self) -> None:
+        self.counters: Counter[str] = Counter()
+        self.phases: Dict[str, PhaseStats] = {}
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self._depth = 0
+
+    def enable(self, profile: bool = False, trace_memory: bool = False) -> None:
+        """Starts recording, optionally with a cProfile and the peak traced memory of every top level phase."""
+        self.reset()
+        self.enabled = True
+        self.profile = profile
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self) -> None:
+        """Stops recording; what was recorded stays available until the next enable() or reset()."""
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[counter] += amount
+
+    def phase(self, name: str) -> ContextManager[None]:
+        """Context manager timing one call of the named phase."""
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return self._timed_phase(name)
+
+    def timed(self, name: str) -> Callable[[F], F]:
+        """Decorator timing every call of a function as the named phase."""
+        def decorator(function: F) -> F:
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.phase(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def _timed_phase(self, name: str) -> Iterator[None]:
+        stats = self.phases.setdefault(name, PhaseStats())
+        top_level = self._depth == 0
+        profiler = None
+        if top_level and self.profile:
+            profiler = self.profiles.setdefault(name, cProfile.Profile())
+        if top_level and self.trace_memory:
+            tracemalloc.reset_peak()
+
+        self._depth += 1
+        if profiler is not None:
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            self._depth -= 1
+            stats.calls += 1
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            if top_level and self.trace_memory:
+                stats.peak_bytes = max(stats.peak_bytes or 0, tracemalloc.get_traced_memory()[1])
+
+    def report(self) -> Dict[str, Any]:
+        """Everything recorded so far as json serializable data."""
+        return {
+            "phases": {name: stats.as_dict() for name, stats in self.phases.items()},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def dump_profiles(self, directory: Path) -> list[Path]:
+        """Writes the cProfile of every top level phase as <phase>.prof, readable with pstats or snakeviz."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for name, profiler in self.profiles.items():
+            path = directory / f"{name}.prof"
+            profiler.dump_stats(path)
+            paths.append(path)
+        return paths
+
+
+# Shared by the whole package; main.py enables it with --profile
+instrumentation = Instrumentation()
@@ -0,0 +1,10 @@
+def import_numpy(feature: str):
+    """
+    NumPy, imported on first use so importing the package does not pay for it when
+    none of the vectorized features are used. feature names what needs it in the error.
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(f"{feature} needs NumPy, install it with 'pip install numpy'") from None
+    return numpy
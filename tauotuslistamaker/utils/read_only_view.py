@@ -0,0 +1,39 @@
+from typing import Iterator, Sequence, TypeVar, overload
+
+T = TypeVar("T")
+
+
+class ReadOnlyView(Sequence[T]):
+    """
+    Zero-copy, read-only window onto a list owned by a collection.
+    It always shows the current contents of the list; copy it (e.g. list(view))
+    to keep a snapshot that does not change with the schedule.
+    """
+    __slots__ = ("_items",)
+
+    def __init__(self, items: list[T]) -> None:
+        self._items = items
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+    @overload
+    def __getitem__(self, index: slice) -> tuple[T, ...]: ...
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self._items[index])
+        return self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._items)
+
+    def __reversed__(self) -> Iterator[T]:
+        return reversed(self._items)
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._items
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._items!r})"
@@ -1,9 +1,51 @@
-from datetime import datetime, timedelta
-
-def round_time_to_nearest_quarter(dt, delta=timedelta(minutes=15)):
-    return datetime.min + round((dt - datetime.min) / delta) * delta
-
-def time_diff_in_minutes(start: datetime, end: datetime) -> int:
-    """Returns the difference between two datetime objects in whole minutes."""
-    delta = end - start
-    return int(delta.total_seconds() // 60)
+from datetime import datetime, timedelta
+
+# Intervals are stored as whole minutes from DAY_ORIGIN; datetime is only used
+# when parsing input and formatting output.
+DAY_ORIGIN = datetime(1900, 1, 1)
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_HOUR = 60
+# Shifts, breaks and checkout ticks are all laid out on quarter-hour slots
+SLOT_MINUTES = 15
+
+def round_time_to_nearest_quarter(minutes: float, quarter: int = 15) -> int:
+    return round(minutes / quarter) * quarter
+
+def time_diff_in_minutes(start: datetime, end: datetime) -> int:
+    """Returns the difference between two datetime objects in whole minutes."""
+    delta = end - start
+    return int(delta.total_seconds() // 60)
+
+def datetime_to_minutes(dt: datetime) -> int:
+    """Converts a datetime into whole minutes from DAY_ORIGIN."""
+    return time_diff_in_minutes(DAY_ORIGIN, dt)
+
+def minutes_to_datetime(minutes: int) -> datetime:
+    """Converts whole minutes from DAY_ORIGIN back into a datetime."""
+    return DAY_ORIGIN + timedelta(minutes=minutes)
+
+def format_minutes(minutes: int) -> str:
+    """Formats minutes from DAY_ORIGIN as a HH:MM clock time."""
+    return minutes_to_datetime(minutes).strftime("%H:%M")
+
+def hour_of_day(minutes: int) -> int:
+    """Returns the clock hour (0-23) of minutes from DAY_ORIGIN, like datetime.hour."""
+    return (minutes // MINUTES_PER_HOUR) % 24
+
+def is_slot_aligned(minutes: int, slot_minutes: int = SLOT_MINUTES) -> bool:
+    """Checks whether minutes from DAY_ORIGIN fall on a slot boundary."""
+    return minutes % slot_minutes == 0
+
+def span_to_slot_mask(start_time: int, end_time: int, slot_minutes: int = SLOT_MINUTES) -> int:
+    """Bitmask of the slots covered by a slot aligned span; bit k is the slot starting at k * slot_minutes."""
+    first_slot = start_time // slot_minutes
+    return ((1 << (end_time // slot_minutes - first_slot)) - 1) << first_slot
+
+def ticks_near(minute: int, first_tick_start: int, tick_minutes: int) -> range:
+    """
+    Start times of the ticks (first_tick_start + k * tick_minutes, k >= 0) that start less than
+    one tick away from minute. Only these ticks can relate differently to minute than the tick before.
+    """
+    first_tick = max(0, (minute - tick_minutes - first_tick_start) // tick_minutes + 1)
+    end_tick = max(first_tick, -(-(minute + tick_minutes - first_tick_start) // tick_minutes))
+    return range(first_tick_start + first_tick * tick_minutes, first_tick_start + end_tick * tick_minutes, tick_minutes)
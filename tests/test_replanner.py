@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from tauotuslistamaker.benchmarks import write_store
+from tauotuslistamaker.managers import BreakManager, CashierAbsent, CashierAdded, CheckoutManager, DataManager, Replanner
+from tauotuslistamaker.utils import MINUTES_PER_HOUR, format_minutes
+
+
+def schedule_store(directory, cashier_count, seed=0, extra_cashiers=()):
+    cashiers_path, config_path = write_store(directory, cashier_count, seed)
+    if extra_cashiers:
+        with open(cashiers_path, "r") as json_file:
+            cashiers = json.load(json_file)
+        with open(cashiers_path, "w") as json_file:
+            json.dump(cashiers + list(extra_cashiers), json_file)
+    data_manager = DataManager()
+    data_manager.load_data(str(cashiers_path))
+    data_manager.load_config(str(config_path))
+    break_manager = BreakManager(data_manager.cashiers, data_manager.all_breaks)
+    break_manager.generate_breaks_list()
+    checkout_manager = CheckoutManager(data_manager.cashiers, data_manager.checkouts, data_manager.compiled_config)
+    checkout_manager.assign_checkouts_to_cashiers()
+    return data_manager, break_manager, checkout_manager
+
+
+def published_state(data_manager, break_manager):
+    """Everything a re-plan could change, as plain values."""
+    def event(interval):
+        tauottaja = getattr(interval, "tauottaja", None)
+        return (type(interval).__name__, interval.start_time, interval.end_time,
+                interval.cashier.name, tauottaja.name if tauottaja else None,
+                interval.checkout.identifier if interval.checkout else None)
+
+    def schedule(collection):
+        return (collection.boundary_interval.start_time, collection.boundary_interval.end_time,
+                [event(interval) for interval in collection.all_events],
+                [(gap.start_time, gap.end_time) for gap in collection.availability])
+
+    return (
+        [(cashier.name, schedule(cashier.schedule)) for cashier in data_manager.cashiers],
+        [(checkout.identifier, schedule(checkout.schedule)) for checkout in data_manager.checkouts],
+        [(item["tauottaja"].name if item["tauottaja"] else None,
+          [(b.cashier.name, b.start_time) for b in item["breaks_covered"]], item["total_minutes"])
+         for item in break_manager.breaks_schedule_list],
+    )
+
+
+def test_failed_replan_leaves_the_published_schedule_untouched(tmp_path):
+    data_manager, break_manager, checkout_manager = schedule_store(tmp_path, 5)
+    replanner = Replanner(break_manager, checkout_manager)
+    before = published_state(data_manager, break_manager)
+
+    with pytest.raises(ValueError, match="Not enough cashiers"):
+        replanner.replan([CashierAbsent("Cashier 5")], now=6 * MINUTES_PER_HOUR)
+
+    assert published_state(data_manager, break_manager) == before
+    assert len(data_manager.cashiers) == 5
+    assert replanner.checkout_manager is checkout_manager
+    # The replanner is still usable, and re-planning nothing changes nothing
+    assert replanner.replan([], now=6 * MINUTES_PER_HOUR).churned_checkout_minutes == 0
+    assert published_state(data_manager, break_manager) == before
+
+
+def test_added_cashier_cannot_start_before_the_freeze_time(tmp_path):
+    _, break_manager, checkout_manager = schedule_store(tmp_path, 12)
+    replanner = Replanner(break_manager, checkout_manager)
+
+    with pytest.raises(ValueError, match="cannot start before the freeze time"):
+        replanner.replan([CashierAdded("New", 6 * MINUTES_PER_HOUR, 22 * MINUTES_PER_HOUR)], now=15 * MINUTES_PER_HOUR)
+
+
+@pytest.mark.parametrize("cashier_count, seed", [(5, 0), (8, 1), (8, 2), (12, 0), (20, 0)])
+def test_adding_a_cashier_never_breaks_a_day_that_schedules(tmp_path, cashier_count, seed):
+    closing_time = 22 * MINUTES_PER_HOUR
+    for hour in range(6, 21, 2):
+        for shift_length in (4 * MINUTES_PER_HOUR, 8 * MINUTES_PER_HOUR):
+            now = hour * MINUTES_PER_HOUR
+            shift_end = min(now + shift_length, closing_time)
+            new_cashier = {"name": "New", "shift_start": format_minutes(now), "shift_end": format_minutes(shift_end)}
+            try:
+                schedule_store(tmp_path / "fresh", cashier_count, seed, [new_cashier])
+            except ValueError:
+                # The day cannot be scheduled with the new cashier even from scratch
+                continue
+
+            _, break_manager, checkout_manager = schedule_store(tmp_path / "replan", cashier_count, seed)
+            Replanner(break_manager, checkout_manager).replan([CashierAdded("New", now, shift_end)], now)